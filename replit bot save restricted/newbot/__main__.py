@@ -20,7 +20,13 @@ import importlib
 import gc
 from pyrogram import idle
 from devgagan.modules import ALL_MODULES
-from devgagan.core.mongo.plans_db import check_and_remove_expired_users
+from devgagan.modules.plans import expire_premium_plans
+from devgagan.core.mongo.plans_db import refresh_entitlements
+from devgagan.core.notifier import notifier
+from devgagan.core.userbot_pool import userbot_pool
+from devgagan.core.downloader import run_partial_gc
+from devgagan.core.user_registry import user_registry
+from config import STATE_BACKEND
 from aiojobs import create_scheduler
 # Add this at the top of your main.py
 import sys
@@ -37,13 +43,14 @@ loop = asyncio.get_event_loop()
 async def schedule_expiry_check():
     scheduler = await create_scheduler()
     while True:
-        await scheduler.spawn(check_and_remove_expired_users())
+        await scheduler.spawn(expire_premium_plans())
         await asyncio.sleep(60)  # Check every hour
         gc.collect()
 
 async def devggn_boot():
     for all_module in ALL_MODULES:
         importlib.import_module("devgagan.modules." + all_module)
+    from devgagan.modules.main import resume_batch_jobs
     print("""
 ---------------------------------------------------
 📂 Bot Deployed successfully ...
@@ -56,7 +63,16 @@ async def devggn_boot():
 
     asyncio.create_task(schedule_expiry_check())
     print("Auto removal started ...")
+    asyncio.create_task(userbot_pool.run_reaper())
+    asyncio.create_task(run_partial_gc())
+    asyncio.create_task(user_registry.run())
+    asyncio.create_task(notifier.run())
+    asyncio.create_task(resume_batch_jobs())
+    if STATE_BACKEND == "mongo":
+        # Only a multi-instance deployment has plans changed behind our back
+        asyncio.create_task(refresh_entitlements())
     await idle()
+    await user_registry.flush()
     print("Bot stopped...")
 
 
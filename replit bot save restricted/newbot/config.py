@@ -28,3 +28,46 @@ STRING = getenv("STRING", None)
 YT_COOKIES = getenv("YT_COOKIES", YTUB_COOKIES)
 DEFAULT_SESSION = getenv("DEFAUL_SESSION", None)  # added old method of invite link joining
 INSTA_COOKIES = getenv("INSTA_COOKIES", INST_COOKIES)
+BATCH_WORKERS = int(getenv("BATCH_WORKERS", "3"))  # parallel download/upload workers per /batch
+PREFETCH_DEPTH = int(getenv("PREFETCH_DEPTH", "2"))  # items downloaded ahead of the one being uploaded
+STAGING_LIMIT_MB = int(getenv("STAGING_LIMIT_MB", "4096"))  # cap for prefetched bytes on disk
+STREAM_RELAY = getenv("STREAM_RELAY", "false").lower() == "true"  # pipe downloads straight into the uploader
+RELAY_BUFFER_MB = int(getenv("RELAY_BUFFER_MB", "16"))  # in-memory ring between relay download and upload
+SPLIT_UPLOAD_CONCURRENCY = int(getenv("SPLIT_UPLOAD_CONCURRENCY", "2"))  # parts of one split file uploaded at once
+FILE_CACHE_SIZE = int(getenv("FILE_CACHE_SIZE", "5000"))  # in-process entries of the upload result cache
+FILE_CACHE_TTL_DAYS = int(getenv("FILE_CACHE_TTL_DAYS", "30"))  # unused cache entries expire after this
+DOWNLOAD_CONNECTIONS = int(getenv("DOWNLOAD_CONNECTIONS", "4"))  # max parallel streams per userbot download
+USERBOT_POOL_SIZE = int(getenv("USERBOT_POOL_SIZE", "50"))  # max live per-user userbot sessions
+USERBOT_IDLE_TTL = int(getenv("USERBOT_IDLE_TTL", "600"))  # seconds before an idle userbot is stopped
+PARTIAL_TTL_HOURS = int(getenv("PARTIAL_TTL_HOURS", "24"))  # unfinished downloads kept for resuming this long
+MAX_TRANSFERS = int(getenv("MAX_TRANSFERS", "8"))  # downloads allowed to run at once across all users
+DISK_RESERVE_MB = int(getenv("DISK_RESERVE_MB", "512"))  # free space never handed out to transfers
+PREFETCH_HEADROOM_MB = int(getenv("PREFETCH_HEADROOM_MB", "4096"))  # free space a batch prefetch must leave behind
+SETTINGS_CACHE_TTL = int(getenv("SETTINGS_CACHE_TTL", "300"))  # seconds a user's settings are served from memory
+SETTINGS_CACHE_SIZE = int(getenv("SETTINGS_CACHE_SIZE", "10000"))  # users whose settings are kept in memory
+USER_FLUSH_INTERVAL = int(getenv("USER_FLUSH_INTERVAL", "5"))  # seconds between batched user registrations
+USER_FLUSH_BATCH = int(getenv("USER_FLUSH_BATCH", "500"))  # new users that trigger an early flush
+USER_SEEN_LIMIT = int(getenv("USER_SEEN_LIMIT", "1000000"))  # user ids remembered in memory as registered
+NOTIFY_RATE = int(getenv("NOTIFY_RATE", "20"))  # background notices sent per second at most
+MONGO_MAX_POOL = int(getenv("MONGO_MAX_POOL", "50"))  # connections in the shared Mongo pool at most
+MONGO_MIN_POOL = int(getenv("MONGO_MIN_POOL", "0"))  # connections kept open while idle
+MONGO_MAX_IDLE_MS = int(getenv("MONGO_MAX_IDLE_MS", "300000"))  # idle pooled connections close after this
+MONGO_CONNECT_TIMEOUT_MS = int(getenv("MONGO_CONNECT_TIMEOUT_MS", "10000"))
+MONGO_SERVER_SELECTION_TIMEOUT_MS = int(getenv("MONGO_SERVER_SELECTION_TIMEOUT_MS", "10000"))
+MONGO_SOCKET_TIMEOUT_MS = int(getenv("MONGO_SOCKET_TIMEOUT_MS", "60000"))
+STATE_BACKEND = getenv("STATE_BACKEND", "memory").lower()  # "mongo" to share cooldowns and job locks between instances
+JOB_LOCK_TTL = int(getenv("JOB_LOCK_TTL", "7200"))  # seconds a user's job lock survives without progress
+RESUME_BATCH_JOBS = getenv("RESUME_BATCH_JOBS", "true").lower() == "true"  # only one instance should resume batches at boot
+FFPROBE_CONCURRENCY = int(getenv("FFPROBE_CONCURRENCY", "4"))  # ffprobe processes allowed at once
+FFMPEG_CONCURRENCY = int(getenv("FFMPEG_CONCURRENCY", "2"))  # ffmpeg thumbnail grabs allowed at once
+THUMB_CACHE_SIZE = int(getenv("THUMB_CACHE_SIZE", "256"))  # generated thumbnails kept on disk for reuse
+FASTSTART_MAX_MB = int(getenv("FASTSTART_MAX_MB", "2000"))  # larger videos are uploaded without the faststart remux
+REMUX_WORKERS = int(getenv("REMUX_WORKERS", "2"))  # faststart remuxes allowed at once
+YTDL_MAX_JOBS = int(getenv("YTDL_MAX_JOBS", "3"))  # /dl and /adl downloads running at once across all users
+YTDL_FRAGMENTS = int(getenv("YTDL_FRAGMENTS", "4"))  # HLS/DASH fragments fetched in parallel per job
+YTDL_CHUNK_MB = int(getenv("YTDL_CHUNK_MB", "10"))  # HTTP range size per request; works around per-connection throttling
+YTDL_CONNECTIONS = int(getenv("YTDL_CONNECTIONS", "8"))  # aria2c connections per job when aria2c is installed
+YTDL_JOB_RATE_KB = int(getenv("YTDL_JOB_RATE_KB", "0"))  # per-job download cap in KiB/s, 0 for none
+YTDL_TOTAL_RATE_KB = int(getenv("YTDL_TOTAL_RATE_KB", "0"))  # cap shared by all running jobs in KiB/s, 0 for none
+YTDL_ARIA2C = getenv("YTDL_ARIA2C", "true").lower() == "true"  # hand plain HTTP(S) downloads to aria2c if present
+PREMIUM_REFRESH = int(getenv("PREMIUM_REFRESH", "60"))  # seconds between checks for premium plans changed by other instances (STATE_BACKEND=mongo only)
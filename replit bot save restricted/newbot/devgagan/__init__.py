@@ -17,9 +17,16 @@ import logging
 import time
 from pyrogram import Client
 from pyrogram.enums import ParseMode 
-from config import API_ID, API_HASH, BOT_TOKEN, STRING, MONGO_DB, DEFAULT_SESSION
+from config import API_ID, API_HASH, BOT_TOKEN, STRING, DEFAULT_SESSION, DOWNLOAD_CONNECTIONS
 from telethon.sync import TelegramClient
-from motor.motor_asyncio import AsyncIOMotorClient
+from devgagan.core.mongo import client as tclient
+from devgagan.core.mongo.cache_db import create_cache_indexes
+from devgagan.core.mongo.settings_db import migrate_legacy_profiles
+from devgagan.core.locks import load_locked_channels
+from devgagan.core.mongo.users_db import create_users_indexes
+from devgagan.core.mongo.plans_db import load_entitlements, create_plans_indexes
+from devgagan.core.mongo.jobs_db import create_jobs_indexes
+from devgagan.core.state import state
 
 loop = asyncio.new_event_loop()
 asyncio.set_event_loop(loop)
@@ -49,14 +56,13 @@ else:
 
 
 if DEFAULT_SESSION:
-    userrbot = Client("userrbot", api_id=API_ID, api_hash=API_HASH, session_string=DEFAULT_SESSION)
+    userrbot = Client("userrbot", api_id=API_ID, api_hash=API_HASH, session_string=DEFAULT_SESSION, max_concurrent_transmissions=DOWNLOAD_CONNECTIONS)
 else:
     userrbot = None
 
 telethon_client = TelegramClient('telethon_session', API_ID, API_HASH).start(bot_token=BOT_TOKEN)
 
 # MongoDB setup
-tclient = AsyncIOMotorClient(MONGO_DB)
 tdb = tclient["telegram_bot"]  # Your database
 token = tdb["tokens"]  # Your tokens collection
 
@@ -67,6 +73,14 @@ async def create_ttl_index():
 # Run the TTL index creation when the bot starts
 async def setup_database():
     await create_ttl_index()
+    await create_cache_indexes()
+    await migrate_legacy_profiles()
+    await load_locked_channels()
+    await create_users_indexes()
+    await create_plans_indexes()
+    await load_entitlements()
+    await create_jobs_indexes()
+    await state.setup()
     print("MongoDB TTL index created.")
 
 async def restrict_bot():
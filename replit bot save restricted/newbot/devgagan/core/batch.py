@@ -0,0 +1,160 @@
+# ---------------------------------------------------
+# File Name: batch.py
+# Description: A Pyrogram bot for downloading files from Telegram channels or groups
+#              and uploading them back to Telegram.
+# Author: Gagan
+# GitHub: https://github.com/devgaganin/
+# Telegram: https://t.me/team_spy_pro
+# YouTube: https://youtube.com/@dev_gagan
+# Created: 2025-01-11
+# Last Modified: 2025-01-11
+# Version: 2.0.5
+# License: MIT License
+# Bounded worker pool that keeps batch output in message order
+# ---------------------------------------------------
+
+import asyncio
+import time
+from pyrogram.errors import FloodWait
+
+
+class OrderedGate:
+    """Reorder buffer: items may finish out of order but pass the gate by sequence."""
+
+    def __init__(self, start=0):
+        self.next_seq = start
+        self._cond = asyncio.Condition()
+
+    async def wait(self, seq):
+        async with self._cond:
+            await self._cond.wait_for(lambda: self.next_seq >= seq)
+
+    async def advance(self, seq):
+        async with self._cond:
+            if self.next_seq == seq:
+                self.next_seq = seq + 1
+                self._cond.notify_all()
+
+
+class Turn:
+    """Awaitable handle for one item's place in the delivery order.
+
+    Once awaited, the item may already have put something in the chat, so
+    the pool no longer re-runs it; `send` retries a single send instead.
+    """
+
+    def __init__(self, gate, seq, backoff, retries):
+        self.gate = gate
+        self.seq = seq
+        self.backoff = backoff
+        self.retries = retries
+        self.started = False
+
+    async def __call__(self):
+        await self.gate.wait(self.seq)
+        self.started = True
+
+    def is_next(self):
+        return self.gate.next_seq >= self.seq
+
+    async def send(self, send, *args, **kwargs):
+        """Wait for this item's turn, then await `send(...)`, retrying only it on FloodWait."""
+        await self()
+        for attempt in range(self.retries):
+            await self.backoff.pause()
+            try:
+                result = await send(*args, **kwargs)
+                self.backoff.ok()
+                return result
+            except FloodWait as fw:
+                if attempt + 1 >= self.retries:
+                    raise
+                print(f"FloodWait of {fw.value}s sending batch item {self.seq}, retry {attempt + 1}")
+                self.backoff.hit(fw.value)
+
+
+class FloodBackoff:
+    """Shared pause for every worker of a batch, grown on FloodWait and decayed on success."""
+
+    def __init__(self, ceiling=300):
+        self.ceiling = ceiling
+        self.delay = 0
+        self.blocked_until = 0
+
+    def hit(self, seconds):
+        self.delay = min(self.ceiling, max(seconds, self.delay * 2, 1))
+        self.blocked_until = max(self.blocked_until, time.monotonic() + seconds)
+
+    def ok(self):
+        self.delay = self.delay / 2 if self.delay > 1 else 0
+
+    async def pause(self):
+        wait = max(self.blocked_until - time.monotonic(), 0) + self.delay
+        if wait > 0:
+            await asyncio.sleep(wait)
+
+
+async def run_ordered_pool(items, handler, workers, is_active, on_delivered=None, on_skipped=None,
+                           max_retries=3, depth=None):
+    """Run `handler(item, turn)` over items with at most `workers` in flight.
+
+    Items are taken in order and download concurrently; `handler` must await
+    `turn()` (or use `turn.send`) before sending anything so the target chat
+    sees them in order. A FloodWait before that point re-runs the item; after
+    it, nothing is re-run. Items that fail are passed to
+    `on_skipped(seq, item, reason)`.
+    `is_active` is awaited before each item so a cancel stops the pool.
+    `depth` limits how many items may be fetched ahead of the one being sent.
+    """
+    queue = asyncio.Queue()
+    for seq, item in enumerate(items):
+        queue.put_nowait((seq, item))
+    gate = OrderedGate()
+    backoff = FloodBackoff()
+
+    async def worker():
+        while await is_active():
+            try:
+                seq, item = queue.get_nowait()
+            except asyncio.QueueEmpty:
+                return
+            failure = None
+            try:
+                if depth is not None:
+                    await gate.wait(seq - depth)
+                for attempt in range(max_retries):
+                    await backoff.pause()
+                    if not await is_active():
+                        break
+                    turn = Turn(gate, seq, backoff, max_retries)
+                    try:
+                        await handler(item, turn)
+                        backoff.ok()
+                        failure = None
+                        break
+                    except FloodWait as fw:
+                        backoff.hit(fw.value)
+                        failure = f"Telegram rate limit ({fw.value}s)"
+                        if turn.started:
+                            # Part of it may already be in the chat; running it again could duplicate it
+                            break
+                        print(f"FloodWait of {fw.value}s on batch item {seq}, retry {attempt + 1}")
+                    except Exception as e:
+                        print(f"Batch item {seq} failed: {e}")
+                        failure = str(e) or type(e).__name__
+                        break
+                if failure and on_skipped:
+                    try:
+                        await on_skipped(seq, item, failure)
+                    except Exception as e:
+                        print(f"Batch skip notice failed: {e}")
+            finally:
+                await gate.wait(seq)
+                if on_delivered:
+                    try:
+                        await on_delivered(seq, item)
+                    except Exception as e:
+                        print(f"Batch progress update failed: {e}")
+                await gate.advance(seq)
+
+    await asyncio.gather(*(worker() for _ in range(max(1, min(workers, len(items))))))
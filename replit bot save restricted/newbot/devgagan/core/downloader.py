@@ -0,0 +1,209 @@
+# ---------------------------------------------------
+# File Name: downloader.py
+# Description: A Pyrogram bot for downloading files from Telegram channels or groups
+#              and uploading them back to Telegram.
+# Author: Gagan
+# GitHub: https://github.com/devgaganin/
+# Telegram: https://t.me/team_spy_pro
+# YouTube: https://youtube.com/@dev_gagan
+# Created: 2025-01-11
+# Last Modified: 2025-01-11
+# Version: 2.0.5
+# License: MIT License
+# Parallel ranged downloader for userbot media
+# ---------------------------------------------------
+
+import asyncio
+import hashlib
+import json
+import os
+import time
+from pyrogram.errors import FloodWait
+from config import DOWNLOAD_CONNECTIONS, PARTIAL_TTL_HOURS
+from devgagan.core.filecache import get_file_unique_id
+
+CHUNK_SIZE = 1024 * 1024  # stream_media offsets/limits are counted in 1 MB chunks
+SEGMENT_CHUNKS = 16  # each worker fetches 16 MB ranges from a shared queue
+PARALLEL_MIN_SIZE = 20 * 1024 * 1024
+DOWNLOAD_DIR = "downloads"
+PARTIAL_DIR = os.path.join(DOWNLOAD_DIR, ".partial")
+DOWNLOAD_ATTEMPTS = 3
+
+# One writer per partial file: two users fetching the same source must not share it.
+# temp path -> [lock, number of downloads using it]
+_partial_locks = {}
+
+
+def pick_connections(file_size):
+    """Small files gain nothing from extra streams; large ones get the configured maximum."""
+    if file_size < PARALLEL_MIN_SIZE:
+        return 1
+    if file_size < 200 * 1024 * 1024:
+        return min(2, DOWNLOAD_CONNECTIONS)
+    if file_size < 1024 * 1024 * 1024:
+        return min(4, DOWNLOAD_CONNECTIONS)
+    return DOWNLOAD_CONNECTIONS
+
+
+def _preallocate(fd, size):
+    if hasattr(os, "posix_fallocate"):
+        try:
+            os.posix_fallocate(fd, 0, size)
+            return
+        except OSError:
+            pass
+    os.ftruncate(fd, size)
+
+
+def source_of(msg):
+    return {"chat": msg.chat.id, "msg_id": msg.id, "file_unique_id": get_file_unique_id(msg)}
+
+
+def partial_paths(source):
+    """Partial data and its checkpoint sidecar, named after the source so restarts find them."""
+    digest = hashlib.sha1(json.dumps(source, sort_keys=True).encode()).hexdigest()
+    base = os.path.join(PARTIAL_DIR, digest)
+    return f"{base}.part", f"{base}.json"
+
+
+def load_checkpoint(sidecar_path, source, file_size):
+    """Completed segment starts from a matching sidecar, or None if there is nothing to resume."""
+    try:
+        with open(sidecar_path) as f:
+            state = json.load(f)
+    except (OSError, ValueError):
+        return None
+    if state.get("source") != source or state.get("file_size") != file_size or state.get("segment_chunks") != SEGMENT_CHUNKS:
+        return None
+    return set(state.get("done", []))
+
+
+def save_checkpoint(sidecar_path, source, file_size, done_segments):
+    temp_path = f"{sidecar_path}.tmp"
+    with open(temp_path, "w") as f:
+        json.dump({
+            "source": source,
+            "file_size": file_size,
+            "segment_chunks": SEGMENT_CHUNKS,
+            "done": sorted(done_segments),
+        }, f)
+    os.replace(temp_path, sidecar_path)
+
+
+def discard_partial(source):
+    for path in partial_paths(source):
+        if os.path.exists(path):
+            os.remove(path)
+
+
+async def parallel_download(client, msg, file_name, file_size, progress=None, progress_args=()):
+    """Download `msg` with several concurrent `stream_media` ranges written in place.
+
+    Works like `client.download_media(msg, file_name=...)`: the file lands in
+    downloads/ and the absolute path is returned. The client must allow
+    `max_concurrent_transmissions` > 1 or the ranges are serialized by Pyrogram.
+    Finished segments are checkpointed next to the partial file, so a failed
+    or interrupted download resumes from them on the next attempt.
+    """
+    os.makedirs(PARTIAL_DIR, exist_ok=True)
+    source = source_of(msg)
+    temp_path, sidecar_path = partial_paths(source)
+    entry = _partial_locks.setdefault(temp_path, [asyncio.Lock(), 0])
+    entry[1] += 1
+    try:
+        async with entry[0]:
+            return await _download_ranges(client, msg, file_name, file_size, source, temp_path, sidecar_path, progress, progress_args)
+    finally:
+        entry[1] -= 1
+        if not entry[1]:
+            _partial_locks.pop(temp_path, None)
+
+
+async def _download_ranges(client, msg, file_name, file_size, source, temp_path, sidecar_path, progress, progress_args):
+    path = os.path.abspath(os.path.join(DOWNLOAD_DIR, os.path.basename(file_name)))
+    total_chunks = -(-file_size // CHUNK_SIZE)
+
+    done_segments = load_checkpoint(sidecar_path, source, file_size) if os.path.exists(temp_path) else None
+    resuming = done_segments is not None
+    done_segments = done_segments or set()
+    segments = asyncio.Queue()
+    done = 0
+    for start in range(0, total_chunks, SEGMENT_CHUNKS):
+        count = min(SEGMENT_CHUNKS, total_chunks - start)
+        if start in done_segments:
+            done += min(count * CHUNK_SIZE, file_size - start * CHUNK_SIZE)
+        else:
+            segments.put_nowait((start, count))
+
+    fd = os.open(temp_path, os.O_WRONLY | os.O_CREAT | (0 if resuming else os.O_TRUNC), 0o644)
+    try:
+        if not resuming:
+            _preallocate(fd, file_size)
+            save_checkpoint(sidecar_path, source, file_size, done_segments)
+
+        async def worker():
+            nonlocal done
+            while True:
+                try:
+                    start, count = segments.get_nowait()
+                except asyncio.QueueEmpty:
+                    return
+                offset = start * CHUNK_SIZE
+                async for chunk in client.stream_media(msg, offset=start, limit=count):
+                    os.pwrite(fd, chunk, offset)
+                    offset += len(chunk)
+                    done += len(chunk)
+                    if progress:
+                        await progress(done, file_size, *progress_args)
+                done_segments.add(start)
+                save_checkpoint(sidecar_path, source, file_size, done_segments)
+
+        tasks = [asyncio.create_task(worker()) for _ in range(pick_connections(file_size))]
+        try:
+            await asyncio.gather(*tasks)
+        finally:
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+    finally:
+        # The partial and its sidecar stay behind on failure for the next attempt
+        os.close(fd)
+
+    os.replace(temp_path, path)
+    os.remove(sidecar_path)
+    return path
+
+
+async def download_userbot_media(client, msg, file_name, file_size, progress=None, progress_args=()):
+    """Parallel, resumable download for big files, Pyrogram's own sequential download otherwise."""
+    if file_size >= PARALLEL_MIN_SIZE and pick_connections(file_size) > 1:
+        for attempt in range(DOWNLOAD_ATTEMPTS):
+            try:
+                return await parallel_download(client, msg, file_name, file_size, progress, progress_args)
+            except FloodWait:
+                raise
+            except Exception as e:
+                print(f"Parallel download attempt {attempt + 1} failed: {e}")
+        print("Parallel download kept failing, falling back to single stream")
+        discard_partial(source_of(msg))
+    return await client.download_media(msg, file_name=file_name, progress=progress, progress_args=progress_args)
+
+
+def cleanup_stale_partials():
+    """Remove partial downloads nobody has touched within PARTIAL_TTL_HOURS."""
+    if not os.path.isdir(PARTIAL_DIR):
+        return
+    cutoff = time.time() - PARTIAL_TTL_HOURS * 3600
+    for name in os.listdir(PARTIAL_DIR):
+        path = os.path.join(PARTIAL_DIR, name)
+        try:
+            if os.path.getmtime(path) < cutoff:
+                os.remove(path)
+        except OSError:
+            pass
+
+
+async def run_partial_gc(interval=3600):
+    while True:
+        cleanup_stale_partials()
+        await asyncio.sleep(interval)
@@ -0,0 +1,92 @@
+# ---------------------------------------------------
+# File Name: filecache.py
+# Description: A Pyrogram bot for downloading files from Telegram channels or groups
+#              and uploading them back to Telegram.
+# Author: Gagan
+# GitHub: https://github.com/devgaganin/
+# Telegram: https://t.me/team_spy_pro
+# YouTube: https://youtube.com/@dev_gagan
+# Created: 2025-01-11
+# Last Modified: 2025-01-11
+# Version: 2.0.5
+# License: MIT License
+# Source-keyed cache of finished uploads kept in LOG_GROUP
+# ---------------------------------------------------
+
+import time
+from collections import OrderedDict
+from config import FILE_CACHE_SIZE, FILE_CACHE_TTL_DAYS
+from devgagan.core.mongo import cache_db
+
+FILE_CACHE_TTL = FILE_CACHE_TTL_DAYS * 86400
+
+# key -> {"log_msg_id", "file_name", "cached_at"}, most recently used last
+_lru = OrderedDict()
+
+
+def get_file_unique_id(msg):
+    for media in (msg.document, msg.video, msg.audio, msg.voice, msg.video_note, msg.photo, msg.animation):
+        if media:
+            return media.file_unique_id
+    return None
+
+
+def cache_key(chat, msg_id, file_unique_id):
+    return f"{chat}:{msg_id}:{file_unique_id}"
+
+
+def _remember(key, log_msg_id, file_name):
+    _lru[key] = {"log_msg_id": log_msg_id, "file_name": file_name, "cached_at": time.time()}
+    _lru.move_to_end(key)
+    while len(_lru) > FILE_CACHE_SIZE:
+        _lru.popitem(last=False)
+
+
+async def lookup(key, file_name):
+    """Return the cached LOG_GROUP message id for `key`, or None on a miss.
+
+    Entries uploaded under a different final file name (another user's rename
+    settings) count as a miss so nobody receives a file named for someone else.
+    """
+    entry = _lru.get(key)
+    if entry and time.time() - entry["cached_at"] > FILE_CACHE_TTL:
+        _lru.pop(key, None)
+        entry = None
+    if entry:
+        _lru.move_to_end(key)
+    else:
+        try:
+            doc = await cache_db.get_entry(key)
+        except Exception as e:
+            print(f"File cache lookup failed: {e}")
+            return None
+        if not doc:
+            return None
+        _remember(key, doc["log_msg_id"], doc.get("file_name"))
+        entry = _lru[key]
+    if entry["file_name"] != file_name:
+        return None
+    try:
+        await cache_db.touch_entry(key)
+    except Exception:
+        pass
+    return entry["log_msg_id"]
+
+
+async def store(key, log_msg_id, file_name):
+    if not log_msg_id:
+        return
+    _remember(key, log_msg_id, file_name)
+    try:
+        await cache_db.set_entry(key, log_msg_id, file_name)
+    except Exception as e:
+        print(f"File cache store failed: {e}")
+
+
+async def invalidate(key):
+    """Drop an entry whose LOG_GROUP message is gone."""
+    _lru.pop(key, None)
+    try:
+        await cache_db.delete_entry(key)
+    except Exception as e:
+        print(f"File cache invalidate failed: {e}")
@@ -0,0 +1,107 @@
+# ---------------------------------------------------
+# File Name: filerange.py
+# Description: A Pyrogram bot for downloading files from Telegram channels or groups
+#              and uploading them back to Telegram.
+# Author: Gagan
+# GitHub: https://github.com/devgaganin/
+# Telegram: https://t.me/team_spy_pro
+# YouTube: https://youtube.com/@dev_gagan
+# Created: 2025-01-11
+# Last Modified: 2025-01-11
+# Version: 2.0.5
+# License: MIT License
+# Split uploads straight out of the original file, no temp part files
+# ---------------------------------------------------
+
+import asyncio
+import io
+import os
+import time
+from config import LOG_GROUP, SPLIT_UPLOAD_CONCURRENCY
+from devgagan.core.func import progress_bar
+
+PART_SIZE = int(1.9 * 1024 * 1024 * 1024)
+
+
+class FileRange(io.RawIOBase):
+    """Read-only file object exposing `length` bytes of `path` starting at `offset`.
+
+    Reads use os.pread on a private descriptor, so several ranges of the same
+    file can be uploaded at once without copying the data anywhere.
+    """
+
+    def __init__(self, path, offset, length, name=None):
+        self._fd = os.open(path, os.O_RDONLY)
+        super().__init__()
+        self.offset = offset
+        self.length = length
+        self.name = name or os.path.basename(path)
+        self._pos = 0
+
+    def readable(self):
+        return True
+
+    def seekable(self):
+        return True
+
+    def tell(self):
+        return self._pos
+
+    def seek(self, pos, whence=io.SEEK_SET):
+        if whence == io.SEEK_CUR:
+            pos += self._pos
+        elif whence == io.SEEK_END:
+            pos += self.length
+        self._pos = min(max(pos, 0), self.length)
+        return self._pos
+
+    def read(self, size=-1):
+        remaining = self.length - self._pos
+        if size is None or size < 0 or size > remaining:
+            size = remaining
+        if size <= 0:
+            return b""
+        data = os.pread(self._fd, size, self.offset + self._pos)
+        self._pos += len(data)
+        return data
+
+    def readinto(self, buffer):
+        data = self.read(len(buffer))
+        buffer[:len(data)] = data
+        return len(data)
+
+    def close(self):
+        if not self.closed and getattr(self, "_fd", None) is not None:
+            os.close(self._fd)
+            self._fd = None
+        super().close()
+
+
+async def upload_file_parts(app, status_chat_id, file_path, caption):
+    """Upload `file_path` to LOG_GROUP as numbered documents of at most PART_SIZE bytes each.
+
+    Parts upload concurrently and may land in LOG_GROUP in any order; the
+    returned messages are in part order so the caller can copy them on in sequence.
+    """
+    file_size = os.path.getsize(file_path)
+    base_name, file_ext = os.path.splitext(os.path.basename(file_path))
+    semaphore = asyncio.Semaphore(SPLIT_UPLOAD_CONCURRENCY)
+
+    async def upload_part(part_number, offset):
+        async with semaphore:
+            part_name = f"{base_name}.part{str(part_number).zfill(3)}{file_ext}"
+            edit = await app.send_message(status_chat_id, f"⬆️ Uploading part {part_number + 1}...")
+            try:
+                with FileRange(file_path, offset, min(PART_SIZE, file_size - offset), part_name) as part:
+                    return await app.send_document(LOG_GROUP, document=part, file_name=part_name,
+                        caption=f"{caption} \n\n**Part : {part_number + 1}**",
+                        progress=progress_bar,
+                        progress_args=("╭─────────────────────╮\n│      **__Pyro Uploader__**\n├─────────────────────", edit, time.time())
+                    )
+            finally:
+                await edit.delete()
+
+    return await asyncio.gather(*(
+        upload_part(part_number, offset)
+        for part_number, offset in enumerate(range(0, file_size, PART_SIZE))
+    ))
@@ -20,36 +20,33 @@ import os
 import re
 from typing import Callable
 from devgagan import app
-import aiofiles
 from devgagan import sex as gf
 from telethon.tl.types import DocumentAttributeVideo, Message
 from telethon.sessions import StringSession
-import pymongo
 from pyrogram.types import InlineKeyboardMarkup, InlineKeyboardButton
-from pyrogram.errors import ChannelBanned, ChannelInvalid, ChannelPrivate, ChatIdInvalid, ChatInvalid
+from pyrogram.errors import ChannelBanned, ChannelInvalid, ChannelPrivate, ChatIdInvalid, ChatInvalid, FloodWait
 from pyrogram.enums import MessageMediaType, ParseMode
 from devgagan.core.func import *
 from pyrogram.errors import RPCError
 from pyrogram.types import Message
-from config import MONGO_DB as MONGODB_CONNECTION_STRING, LOG_GROUP, OWNER_ID, STRING, API_ID, API_HASH
+from config import LOG_GROUP, OWNER_ID, STRING, API_ID, API_HASH
 from devgagan.core.mongo import db as odb
+from devgagan.core.settings import user_settings
+from devgagan.core import locks
+from devgagan.core.staging import staging, admission, queue_text, InsufficientSpace
+from devgagan.core.relay import RelayStream, RelayError, can_relay
+from devgagan.core.filerange import upload_file_parts
+from devgagan.core import filecache
+from devgagan.core.thumbs import get_thumbnail, user_thumb
+from devgagan.core.remux import faststart
+from devgagan.core.downloader import download_userbot_media
+from config import STREAM_RELAY
 from telethon import TelegramClient, events, Button
 from devgagantools import fast_upload
 
-def thumbnail(sender):
-    return f'{sender}.jpg' if os.path.exists(f'{sender}.jpg') else None
-
-# MongoDB database name and collection name
-DB_NAME = "smart_users"
-COLLECTION_NAME = "super_user"
-
 VIDEO_EXTENSIONS = ['mp4', 'mov', 'avi', 'mkv', 'flv', 'wmv', 'webm', 'mpg', 'mpeg', '3gp', 'ts', 'm4v', 'f4v', 'vob']
 DOCUMENT_EXTENSIONS = ['pdf', 'docs']
 
-mongo_app = pymongo.MongoClient(MONGODB_CONNECTION_STRING)
-db = mongo_app[DB_NAME]
-collection = db[COLLECTION_NAME]
-
 if STRING:
     from devgagan import pro
     print("App imported from devgagan.")
@@ -59,8 +56,7 @@ else:
     
 async def fetch_upload_method(user_id):
     """Fetch the user's preferred upload method."""
-    user_data = collection.find_one({"user_id": user_id})
-    return user_data.get("upload_method", "Pyrogram") if user_data else "Pyrogram"
+    return (await user_settings.get(user_id)).upload_method
 
 async def format_caption_to_html(caption: str) -> str:
     caption = re.sub(r"^> (.*)", r"<blockquote>\1</blockquote>", caption, flags=re.MULTILINE)
@@ -110,15 +106,95 @@ def get_message_file_size(msg):
         return msg.video_note.file_size
     return 0    
 
-async def upload_media(sender, target_chat_id, file, caption, edit, topic_id):
+async def relay_upload_media(sender, target_chat_id, relay, caption, edit, topic_id):
+    """Upload a RelayStream through Telethon without staging the file on disk.
+
+    Raises RelayError when nothing was delivered, so the caller can fall back
+    to downloading the file.
+    """
+    progress_message = None
+    log_msg = None
+    delivered = False
+    last_edit = 0
+
+    async def report(done, total):
+        nonlocal last_edit
+        if time.time() - last_edit >= 10 or done == total:
+            last_edit = time.time()
+            try:
+                await progress_message.edit(progress_callback(done, total, sender))
+            except Exception:
+                pass
+
     try:
-        upload_method = await fetch_upload_method(sender)  # Fetch the upload method (Pyrogram or Telethon)
-        metadata = video_metadata(file)
+        await edit.delete()
+        progress_message = await gf.send_message(sender, "**__Relaying...__**")
+        caption = await format_caption_to_html(caption) if caption else None
+        relay.start()
+        uploaded = await gf.upload_file(
+            relay,
+            file_size=relay.size,
+            file_name=relay.name,
+            part_size_kb=512,
+            progress_callback=report
+        )
+        attributes = []
+        if relay.msg.video:
+            attributes = [
+                DocumentAttributeVideo(
+                    duration=relay.msg.video.duration or 0,
+                    w=relay.msg.video.width or 0,
+                    h=relay.msg.video.height or 0,
+                    supports_streaming=True
+                )
+            ]
+        thumb_path = await get_thumbnail(None, sender, None, relay.msg, relay.userbot)
+        await gf.send_file(
+            target_chat_id,
+            uploaded,
+            caption=caption,
+            attributes=attributes,
+            reply_to=topic_id,
+            parse_mode='html',
+            thumb=thumb_path
+        )
+        delivered = True
+        log_msg = await gf.send_file(
+            LOG_GROUP,
+            uploaded,
+            caption=caption,
+            attributes=attributes,
+            parse_mode='html',
+            thumb=thumb_path
+        )
+    except Exception as e:
+        await app.send_message(LOG_GROUP, f"**Relay Upload Failed:** {str(e)}")
+        print(f"Error during relay upload: {e}")
+        if not delivered:
+            raise RelayError(str(e)) from e
+    finally:
+        await relay.close()
+        if progress_message:
+            await progress_message.delete()
+    return log_msg.id if log_msg else None
+
+
+async def upload_media(sender, target_chat_id, file, caption, edit, topic_id, relay=None, prefs=None, source=None, userbot=None, turn=None):
+    """Upload to the target chat and copy to LOG_GROUP; returns the LOG_GROUP message id.
+
+    `source` is the original message (read through `userbot`); its thumbnail
+    is reused instead of grabbing a frame. FloodWait propagates so a batch
+    `turn` can retry the send.
+    """
+    if relay:
+        return await relay_upload_media(sender, target_chat_id, relay, caption, edit, topic_id)
+    thumb_path = None
+    log_msg = None
+    try:
+        upload_method = prefs.upload_method if prefs else await fetch_upload_method(sender)  # Pyrogram or Telethon
+        metadata = await video_metadata(file)
         width, height, duration = metadata['width'], metadata['height'], metadata['duration']
-        try:
-            thumb_path = await screenshot(file, duration, sender)
-        except Exception:
-            thumb_path = None
+        thumb_path = await get_thumbnail(file, sender, duration, source, userbot)
 
         video_formats = {'mp4', 'mkv', 'avi', 'mov'}
         document_formats = {'pdf', 'docx', 'txt', 'epub'}
@@ -127,7 +203,8 @@ async def upload_media(sender, target_chat_id, file, caption, edit, topic_id):
         # Pyrogram upload
         if upload_method == "Pyrogram":
             if file.split('.')[-1].lower() in video_formats:
-                dm = await app.send_video(
+                dm = await deliver(
+                    turn, app.send_video,
                     chat_id=target_chat_id,
                     video=file,
                     caption=caption,
@@ -140,10 +217,11 @@ async def upload_media(sender, target_chat_id, file, caption, edit, topic_id):
                     progress=progress_bar,
                     progress_args=("╭─────────────────────╮\n│      **__Pyro Uploader__**\n├─────────────────────", edit, time.time())
                 )
-                await dm.copy(LOG_GROUP)
+                log_msg = await copy_to_log(dm)
                 
             elif file.split('.')[-1].lower() in image_formats:
-                dm = await app.send_photo(
+                dm = await deliver(
+                    turn, app.send_photo,
                     chat_id=target_chat_id,
                     photo=file,
                     caption=caption,
@@ -152,9 +230,10 @@ async def upload_media(sender, target_chat_id, file, caption, edit, topic_id):
                     reply_to_message_id=topic_id,
                     progress_args=("╭─────────────────────╮\n│      **__Pyro Uploader__**\n├─────────────────────", edit, time.time())
                 )
-                await dm.copy(LOG_GROUP)
+                log_msg = await copy_to_log(dm)
             else:
-                dm = await app.send_document(
+                dm = await deliver(
+                    turn, app.send_document,
                     chat_id=target_chat_id,
                     document=file,
                     caption=caption,
@@ -165,7 +244,7 @@ async def upload_media(sender, target_chat_id, file, caption, edit, topic_id):
                     progress_args=("╭─────────────────────╮\n│      **__Pyro Uploader__**\n├─────────────────────", edit, time.time())
                 )
                 await asyncio.sleep(2)
-                await dm.copy(LOG_GROUP)
+                log_msg = await copy_to_log(dm)
 
         # Telethon upload
         elif upload_method == "Telethon":
@@ -190,7 +269,8 @@ async def upload_media(sender, target_chat_id, file, caption, edit, topic_id):
                 )
             ] if file.split('.')[-1].lower() in video_formats else []
 
-            await gf.send_file(
+            await deliver(
+                turn, gf.send_file,
                 target_chat_id,
                 uploaded,
                 caption=caption,
@@ -199,36 +279,86 @@ async def upload_media(sender, target_chat_id, file, caption, edit, topic_id):
                 parse_mode='html',
                 thumb=thumb_path
             )
-            await gf.send_file(
-                LOG_GROUP,
-                uploaded,
-                caption=caption,
-                attributes=attributes,
-                parse_mode='html',
-                thumb=thumb_path
-            )
+            try:
+                log_msg = await gf.send_file(
+                    LOG_GROUP,
+                    uploaded,
+                    caption=caption,
+                    attributes=attributes,
+                    parse_mode='html',
+                    thumb=thumb_path
+                )
+            except Exception as e:
+                print(f"Error copying upload to log group: {e}")
 
         os.remove(file)
+    except FloodWait:
+        raise
     except Exception as e:
         await app.send_message(LOG_GROUP, f"**Upload Failed:** {str(e)}")
         print(f"Error during media upload: {e}")
 
     finally:
-        if thumb_path and os.path.exists(thumb_path):
-            if os.path.basename(thumb_path) != f"{sender}.jpg":  # Check if the filename is not {sender}.jpg
-                os.remove(thumb_path)
         gc.collect()
+    return log_msg.id if log_msg else None
+
 
+async def copy_to_log(message):
+    """Copy a delivered message to LOG_GROUP for the file cache; None if that fails.
 
-async def get_msg(userbot, sender, edit_id, msg_link, i, message):
+    The user already has the file, so a log copy failing must not fail the item.
+    """
+    try:
+        return await message.copy(LOG_GROUP)
+    except Exception as e:
+        print(f"Error copying upload to log group: {e}")
+        return None
+
+
+async def send_cached(cache_key, log_msg_id, target_chat_id, caption, topic_id):
+    """Deliver a cached LOG_GROUP upload; False (and the entry dropped) if it is gone."""
+    try:
+        result = await app.copy_message(target_chat_id, LOG_GROUP, log_msg_id, caption=caption or "", reply_to_message_id=topic_id)
+        if result:
+            return True
+    except FloodWait:
+        raise
+    except Exception as e:
+        print(f"Cached copy failed, re-uploading: {e}")
+    await filecache.invalidate(cache_key)
+    return False
+
+
+async def needs_split(message, sender, file_size, size_limit):
+    """True when this user may not receive `file_size` bytes as one file."""
+    if file_size <= size_limit:
+        return False
+    return pro is None or await chk_user(message, sender) == 1
+
+
+async def wait_turn(turn):
+    """Block until it is this item's turn to deliver (batch ordering), if any."""
+    if turn:
+        await turn()
+
+
+async def deliver(turn, send, *args, **kwargs):
+    """Await `send(...)` in batch order; batch items retry just this send on FloodWait."""
+    if turn:
+        return await turn.send(send, *args, **kwargs)
+    return await send(*args, **kwargs)
+
+
+async def get_msg(userbot, sender, edit_id, msg_link, i, message, turn=None):
     try:
         # Sanitize the message link
         msg_link = msg_link.split("?single")[0]
         chat, msg_id = None, None
-        saved_channel_ids = load_saved_channel_ids()
         size_limit = 2 * 1024 * 1024 * 1024  # 1.99 GB size limit
         file = ''
         edit = ''
+        staged = 0
+        ticket = None
         # Extract chat and message ID for valid Telegram links
         if 't.me/c/' in msg_link or 't.me/b/' in msg_link:
             parts = msg_link.split("/")
@@ -239,9 +369,9 @@ async def get_msg(userbot, sender, edit_id, msg_link, i, message):
                 chat = int('-100' + parts[parts.index('c') + 1])
                 msg_id = int(parts[-1]) + i
 
-            if chat in saved_channel_ids:
+            if locks.is_locked(chat):
                 await app.edit_message_text(
-                    message.chat.id, edit_id,
+                    sender, edit_id,
                     "Sorry! This channel is protected by **__KINGSTON__**."
                 )
                 return
@@ -266,7 +396,7 @@ async def get_msg(userbot, sender, edit_id, msg_link, i, message):
             edit = await app.edit_message_text(sender, edit_id, "Public link detected...")
             chat = msg_link.split("t.me/")[1].split("/")[0]
             msg_id = int(msg_link.split("/")[-1])
-            await copy_message_with_chat_id(app, userbot, sender, chat, msg_id, edit)
+            await copy_message_with_chat_id(app, userbot, sender, chat, msg_id, edit, turn)
             await edit.delete(2)
             return
             
@@ -276,22 +406,24 @@ async def get_msg(userbot, sender, edit_id, msg_link, i, message):
             await app.delete_messages(sender, edit_id)
             return
 
-        target_chat_id = user_chat_ids.get(message.chat.id, message.chat.id)
+        # One profile snapshot serves the target chat, naming, captions and the upload method
+        prefs = await user_settings.get(sender)
+        target_chat_id = prefs.chat_id or sender
         topic_id = None
         if '/' in str(target_chat_id):
             target_chat_id, topic_id = map(int, target_chat_id.split('/', 1))
 
         # Handle different message types
         if msg.media == MessageMediaType.WEB_PAGE_PREVIEW:
-            await clone_message(app, msg, target_chat_id, topic_id, edit_id, LOG_GROUP)
+            await clone_message(app, msg, target_chat_id, topic_id, edit_id, LOG_GROUP, turn)
             return
 
         if msg.text:
-            await clone_text_message(app, msg, target_chat_id, topic_id, edit_id, LOG_GROUP)
+            await clone_text_message(app, msg, target_chat_id, topic_id, edit_id, LOG_GROUP, turn)
             return
 
         if msg.sticker:
-            await handle_sticker(app, msg, target_chat_id, topic_id, edit_id, LOG_GROUP)
+            await handle_sticker(app, msg, target_chat_id, topic_id, edit_id, LOG_GROUP, turn)
             return
 
         
@@ -303,62 +435,125 @@ async def get_msg(userbot, sender, edit_id, msg_link, i, message):
         #     return
 
         file_name = await get_media_filename(msg)
+        final_name = await get_renamed_name(file_name, sender, prefs)
+        cache_key = filecache.cache_key(chat, msg_id, filecache.get_file_unique_id(msg))
+        # Free users get large files split, never a cached whole-file copy
+        split = await needs_split(message, sender, file_size, size_limit)
+        log_msg_id = None if user_thumb(sender) or split else await filecache.lookup(cache_key, final_name)
+        if log_msg_id:
+            caption = await get_final_caption(msg, sender, prefs)
+            if await deliver(turn, send_cached, cache_key, log_msg_id, target_chat_id, caption, topic_id):
+                return
+
+        if STREAM_RELAY and can_relay(msg, file_size):
+            # Stream straight from the userbot into the uploader, nothing hits disk
+            edit = await app.edit_message_text(sender, edit_id, "**Relaying...**")
+            caption = await get_final_caption(msg, sender, prefs)
+            relay = RelayStream(userbot, msg, file_size, final_name)
+            await wait_turn(turn)
+            try:
+                log_msg_id = await upload_media(sender, target_chat_id, None, caption, edit, topic_id, relay=relay, prefs=prefs)
+            except RelayError:
+                # The relay deleted its status message; download through disk under a new one
+                edit = ''
+                edit_id = (await app.send_message(sender, "⚠️ Streaming failed, downloading the file instead...")).id
+            else:
+                await filecache.store(cache_key, log_msg_id, final_name)
+                edit = ''
+                return
+
+        # Prefetched batch items wait here while staged bytes are over the cap;
+        # the item whose turn it is to upload never waits. This comes before
+        # admission so a waiting prefetch never sits on a transfer slot.
+        staged = await staging.reserve(file_size, lambda: turn is None or turn.is_next())
+
+        # Only the item whose turn it is (or a single link) queues for disk space;
+        # prefetched batch items start early only while there is headroom to spare.
+        if turn is not None and not turn.is_next():
+            ticket = await admission.try_admit(file_size)
+        if ticket is None:
+            await wait_turn(turn)
+            ticket = await admission.acquire(
+                file_size,
+                notify=lambda position, eta: app.edit_message_text(sender, edit_id, queue_text(position, eta))
+            )
         edit = await app.edit_message_text(sender, edit_id, "**Downloading...**")
 
         # Download media
-        file = await userbot.download_media(
+        file = await download_userbot_media(
+            userbot,
             msg,
-            file_name=file_name,
+            file_name,
+            file_size,
             progress=progress_bar,
             progress_args=("╭─────────────────────╮\n│      **__Downloading__...**\n├─────────────────────", edit, time.time())
         )
+        # The ticket covers the download only. Once the bytes are on disk, free
+        # space already accounts for them and `staging` holds them until upload.
+        # A prefetched item that kept its ticket while waiting for its turn
+        # could starve the head of the batch of slots or space forever.
+        await admission.release(ticket)
+        ticket = None
         
-        caption = await get_final_caption(msg, sender)
+        caption = await get_final_caption(msg, sender, prefs)
 
         # Rename file
-        file = await rename_file(file, sender)
+        file = await rename_file(file, sender, prefs)
+        if prefs.faststart and (msg.video or msg.document):
+            file = await faststart(file)
+        await wait_turn(turn)
         if msg.audio:
-            result = await app.send_audio(target_chat_id, file, caption=caption, reply_to_message_id=topic_id)
-            await result.copy(LOG_GROUP)
+            result = await deliver(turn, app.send_audio, target_chat_id, file, caption=caption, reply_to_message_id=topic_id)
+            log_msg = await copy_to_log(result)
+            await filecache.store(cache_key, log_msg.id if log_msg else None, final_name)
             await edit.delete(2)
             os.remove(file)
             return
         
         if msg.voice:
-            result = await app.send_voice(target_chat_id, file, reply_to_message_id=topic_id)
-            await result.copy(LOG_GROUP)
+            result = await deliver(turn, app.send_voice, target_chat_id, file, reply_to_message_id=topic_id)
+            log_msg = await copy_to_log(result)
+            await filecache.store(cache_key, log_msg.id if log_msg else None, final_name)
             await edit.delete(2)
             os.remove(file)
             return
 
 
         if msg.video_note:
-            result = await app.send_video_note(target_chat_id, file, reply_to_message_id=topic_id)
-            await result.copy(LOG_GROUP)
+            result = await deliver(turn, app.send_video_note, target_chat_id, file, reply_to_message_id=topic_id)
+            log_msg = await copy_to_log(result)
+            await filecache.store(cache_key, log_msg.id if log_msg else None, final_name)
             await edit.delete(2)
             os.remove(file)
             return
 
         if msg.photo:
-            result = await app.send_photo(target_chat_id, file, caption=caption, reply_to_message_id=topic_id)
-            await result.copy(LOG_GROUP)
+            result = await deliver(turn, app.send_photo, target_chat_id, file, caption=caption, reply_to_message_id=topic_id)
+            log_msg = await copy_to_log(result)
+            await filecache.store(cache_key, log_msg.id if log_msg else None, final_name)
             await edit.delete(2)
             os.remove(file)
             return
 
         # Upload media
         # await edit.edit("**Checking file...**")
-        if file_size > size_limit and (free_check == 1 or pro is None):
+        if split:
             await edit.delete()
-            await split_and_upload_file(app, sender, target_chat_id, file, caption, topic_id)
+            await split_and_upload_file(app, sender, target_chat_id, file, caption, topic_id, turn)
             return
         elif file_size > size_limit:
-            await handle_large_file(file, sender, edit, caption)
+            log_msg_id = await handle_large_file(file, sender, edit, caption, prefs, source=msg, userbot=userbot, turn=turn)
+            await filecache.store(cache_key, log_msg_id, final_name)
         else:
-            await upload_media(sender, target_chat_id, file, caption, edit, topic_id)
+            log_msg_id = await upload_media(sender, target_chat_id, file, caption, edit, topic_id, prefs=prefs, source=msg, userbot=userbot, turn=turn)
+            await filecache.store(cache_key, log_msg_id, final_name)
 
     except (ChannelBanned, ChannelInvalid, ChannelPrivate, ChatIdInvalid, ChatInvalid):
         await app.edit_message_text(sender, edit_id, "Have you joined the channel?")
+    except FloodWait:
+        raise
+    except InsufficientSpace as e:
+        await app.send_message(sender, f"❌ {e}")
     except Exception as e:
         # await app.edit_message_text(sender, edit_id, f"Failed to save: `{msg_link}`\n\nError: {str(e)}")
         print(f"Error: {e}")
@@ -366,25 +561,27 @@ async def get_msg(userbot, sender, edit_id, msg_link, i, message):
         # Clean up
         if file and os.path.exists(file):
             os.remove(file)
+        await staging.release(staged)
+        await admission.release(ticket)
         if edit:
             await edit.delete(2)
         
-async def clone_message(app, msg, target_chat_id, topic_id, edit_id, log_group):
+async def clone_message(app, msg, target_chat_id, topic_id, edit_id, log_group, turn=None):
     edit = await app.edit_message_text(target_chat_id, edit_id, "Cloning...")
-    devgaganin = await app.send_message(target_chat_id, msg.text.markdown, reply_to_message_id=topic_id)
+    devgaganin = await deliver(turn, app.send_message, target_chat_id, msg.text.markdown, reply_to_message_id=topic_id)
     await devgaganin.copy(log_group)
     await edit.delete()
 
-async def clone_text_message(app, msg, target_chat_id, topic_id, edit_id, log_group):
+async def clone_text_message(app, msg, target_chat_id, topic_id, edit_id, log_group, turn=None):
     edit = await app.edit_message_text(target_chat_id, edit_id, "Cloning text message...")
-    devgaganin = await app.send_message(target_chat_id, msg.text.markdown, reply_to_message_id=topic_id)
+    devgaganin = await deliver(turn, app.send_message, target_chat_id, msg.text.markdown, reply_to_message_id=topic_id)
     await devgaganin.copy(log_group)
     await edit.delete()
 
 
-async def handle_sticker(app, msg, target_chat_id, topic_id, edit_id, log_group):
+async def handle_sticker(app, msg, target_chat_id, topic_id, edit_id, log_group, turn=None):
     edit = await app.edit_message_text(target_chat_id, edit_id, "Handling sticker...")
-    result = await app.send_sticker(target_chat_id, msg.sticker.file_id, reply_to_message_id=topic_id)
+    result = await deliver(turn, app.send_sticker, target_chat_id, msg.sticker.file_id, reply_to_message_id=topic_id)
     await result.copy(log_group)
     await edit.delete()
 
@@ -407,17 +604,16 @@ def get_message_file_size(msg):
         return msg.video.file_size
     return 1
 
-async def get_final_caption(msg, sender):
+async def get_final_caption(msg, sender, prefs):
     # Handle caption based on the upload method
     if msg.caption:
         original_caption = msg.caption.markdown
     else:
         original_caption = ""
     
-    custom_caption = get_user_caption_preference(sender)
+    custom_caption = prefs.caption
     final_caption = f"{original_caption}\n\n{custom_caption}" if custom_caption else original_caption
-    replacements = load_replacement_words(sender)
-    for word, replace_word in replacements.items():
+    for word, replace_word in prefs.replacement_words.items():
         final_caption = final_caption.replace(word, replace_word)
         
     return final_caption if final_caption else None
@@ -452,16 +648,18 @@ async def download_user_stories(userbot, chat_id, msg_id, edit, sender):
         print(f"Failed to fetch story: {e}")
         await edit.edit(f"Error: {e}")
         
-async def copy_message_with_chat_id(app, userbot, sender, chat_id, message_id, edit):
-    target_chat_id = user_chat_ids.get(sender, sender)
+async def copy_message_with_chat_id(app, userbot, sender, chat_id, message_id, edit, turn=None):
+    """Deliver a public-link message; batch items download early and wait for `turn` only to send."""
     file = None
     result = None
     size_limit = 2 * 1024 * 1024 * 1024  # 2 GB size limit
 
     try:
         msg = await app.get_messages(chat_id, message_id)
-        custom_caption = get_user_caption_preference(sender)
-        final_caption = format_caption(msg.caption or '', sender, custom_caption)
+        prefs = await user_settings.get(sender)
+        target_chat_id = prefs.chat_id or sender
+        custom_caption = prefs.caption
+        final_caption = format_caption(msg.caption or '', prefs, custom_caption)
 
         # Parse target_chat_id and topic_id
         topic_id = None
@@ -470,10 +668,10 @@ async def copy_message_with_chat_id(app, userbot, sender, chat_id, message_id, e
 
         # Handle different media types
         if msg.media:
-            result = await send_media_message(app, target_chat_id, msg, final_caption, topic_id)
+            result = await deliver(turn, send_media_message, app, target_chat_id, msg, final_caption, topic_id)
             return
         elif msg.text:
-            result = await app.copy_message(target_chat_id, chat_id, message_id, reply_to_message_id=topic_id)
+            result = await deliver(turn, app.copy_message, target_chat_id, chat_id, message_id, reply_to_message_id=topic_id)
             return
 
         # Fallback if result is None
@@ -491,39 +689,53 @@ async def copy_message_with_chat_id(app, userbot, sender, chat_id, message_id, e
                 return
 
             if msg.text:
-                await app.send_message(target_chat_id, msg.text.markdown, reply_to_message_id=topic_id)
+                await deliver(turn, app.send_message, target_chat_id, msg.text.markdown, reply_to_message_id=topic_id)
                 return
 
-            final_caption = format_caption(msg.caption.markdown if msg.caption else "", sender, custom_caption)
+            final_caption = format_caption(msg.caption.markdown if msg.caption else "", prefs, custom_caption)
+            cache_key = filecache.cache_key(chat_id, message_id, filecache.get_file_unique_id(msg))
+            final_name = await get_renamed_name(await get_media_filename(msg), sender, prefs)
+            file_size = get_message_file_size(msg)
+            split = (msg.video or msg.document) and await needs_split(chat_id, sender, file_size, size_limit)
+            log_msg_id = None if user_thumb(sender) or split else await filecache.lookup(cache_key, final_name)
+            if log_msg_id:
+                if await deliver(turn, send_cached, cache_key, log_msg_id, target_chat_id, final_caption, topic_id):
+                    return
+
             file = await userbot.download_media(
                 msg,
                 progress=progress_bar,
                 progress_args=("╭─────────────────────╮\n│      **__Downloading__...**\n├─────────────────────", edit, time.time())
             )
-            file = await rename_file(file, sender)
+            file = await rename_file(file, sender, prefs)
+            if prefs.faststart and (msg.video or msg.document):
+                file = await faststart(file)
+            await wait_turn(turn)
 
             if msg.photo:
-                result = await app.send_photo(target_chat_id, file, caption=final_caption, reply_to_message_id=topic_id)
+                result = await deliver(turn, app.send_photo, target_chat_id, file, caption=final_caption, reply_to_message_id=topic_id)
             elif msg.video or msg.document:
-                freecheck = await chk_user(chat_id, sender)
-                file_size = get_message_file_size(msg)
-                if file_size > size_limit and (freecheck == 1 or pro is None):
+                if split:
                     await edit.delete()
-                    await split_and_upload_file(app, sender, target_chat_id, file, caption, topic_id)
+                    await split_and_upload_file(app, sender, target_chat_id, file, final_caption, topic_id, turn)
                     return       
                 elif file_size > size_limit:
-                    await handle_large_file(file, sender, edit, final_caption)
+                    log_msg_id = await handle_large_file(file, sender, edit, final_caption, prefs, source=msg, userbot=userbot, turn=turn)
+                    await filecache.store(cache_key, log_msg_id, final_name)
                     return
-                await upload_media(sender, target_chat_id, file, final_caption, edit, topic_id)
+                log_msg_id = await upload_media(sender, target_chat_id, file, final_caption, edit, topic_id, prefs=prefs, source=msg, userbot=userbot, turn=turn)
+                await filecache.store(cache_key, log_msg_id, final_name)
             elif msg.audio:
-                result = await app.send_audio(target_chat_id, file, caption=final_caption, reply_to_message_id=topic_id)
+                result = await deliver(turn, app.send_audio, target_chat_id, file, caption=final_caption, reply_to_message_id=topic_id)
             elif msg.voice:
-                result = await app.send_voice(target_chat_id, file, reply_to_message_id=topic_id)
+                result = await deliver(turn, app.send_voice, target_chat_id, file, reply_to_message_id=topic_id)
             elif msg.sticker:
-                result = await app.send_sticker(target_chat_id, msg.sticker.file_id, reply_to_message_id=topic_id)
+                result = await deliver(turn, app.send_sticker, target_chat_id, msg.sticker.file_id, reply_to_message_id=topic_id)
             else:
                 await edit.edit("Unsupported media type.")
 
+    except FloodWait:
+        raise
     except Exception as e:
         print(f"Error : {e}")
         pass
@@ -551,14 +763,11 @@ async def send_media_message(app, target_chat_id, msg, caption, topic_id):
     return await app.copy_message(target_chat_id, msg.chat.id, msg.id, reply_to_message_id=topic_id)
     
 
-def format_caption(original_caption, sender, custom_caption):
-    delete_words = load_delete_words(sender)
-    replacements = load_replacement_words(sender)
-
+def format_caption(original_caption, prefs, custom_caption):
     # Remove and replace words in the caption
-    for word in delete_words:
+    for word in prefs.delete_words:
         original_caption = original_caption.replace(word, '  ')
-    for word, replace_word in replacements.items():
+    for word, replace_word in prefs.replacement_words.items():
         original_caption = original_caption.replace(word, replace_word)
 
     # Append custom caption if available
@@ -567,68 +776,6 @@ def format_caption(original_caption, sender, custom_caption):
     
 # ------------------------ Button Mode Editz FOR SETTINGS ----------------------------
 
-# Define a dictionary to store user chat IDs
-user_chat_ids = {}
-
-def load_user_data(user_id, key, default_value=None):
-    try:
-        user_data = collection.find_one({"_id": user_id})
-        return user_data.get(key, default_value) if user_data else default_value
-    except Exception as e:
-        print(f"Error loading {key}: {e}")
-        return default_value
-
-def load_saved_channel_ids():
-    saved_channel_ids = set()
-    try:
-        # Retrieve channel IDs from MongoDB collection
-        for channel_doc in collection.find({"channel_id": {"$exists": True}}):
-            saved_channel_ids.add(channel_doc["channel_id"])
-    except Exception as e:
-        print(f"Error loading saved channel IDs: {e}")
-    return saved_channel_ids
-
-def save_user_data(user_id, key, value):
-    try:
-        collection.update_one(
-            {"_id": user_id},
-            {"$set": {key: value}},
-            upsert=True
-        )
-    except Exception as e:
-        print(f"Error saving {key}: {e}")
-
-
-# Delete and replacement word functions
-load_delete_words = lambda user_id: set(load_user_data(user_id, "delete_words", []))
-save_delete_words = lambda user_id, words: save_user_data(user_id, "delete_words", list(words))
-
-load_replacement_words = lambda user_id: load_user_data(user_id, "replacement_words", {})
-save_replacement_words = lambda user_id, replacements: save_user_data(user_id, "replacement_words", replacements)
-
-# User session functions
-def load_user_session(user_id):
-    return load_user_data(user_id, "session")
-
-# Upload preference functions
-set_dupload = lambda user_id, value: save_user_data(user_id, "dupload", value)
-get_dupload = lambda user_id: load_user_data(user_id, "dupload", False)
-
-# User preferences storage
-user_rename_preferences = {}
-user_caption_preferences = {}
-
-# Rename and caption preference functions
-async def set_rename_command(user_id, custom_rename_tag):
-    user_rename_preferences[str(user_id)] = custom_rename_tag
-
-get_user_rename_preference = lambda user_id: user_rename_preferences.get(str(user_id), 'KINGSTON')
-
-async def set_caption_command(user_id, custom_caption):
-    user_caption_preferences[str(user_id)] = custom_caption
-
-get_user_caption_preference = lambda user_id: user_caption_preferences.get(str(user_id), '')
-
 # Initialize the dictionary to store user sessions
 
 sessions = {}
@@ -651,7 +798,7 @@ async def send_settings_message(chat_id, user_id):
         [Button.inline("Session Login", b'addsession'), Button.inline("Logout", b'logout')],
         [Button.inline("Set Thumbnail", b'setthumb'), Button.inline("Remove Thumbnail", b'remthumb')],
         [Button.inline("PDF Wtmrk", b'pdfwt'), Button.inline("Video Wtmrk", b'watermark')],
-        [Button.inline("Upload Method", b'uploadmethod')],  # Include the dynamic Fast DL button
+        [Button.inline("Upload Method", b'uploadmethod'), Button.inline("Streamable MP4", b'faststart')],  # Include the dynamic Fast DL button
         [Button.url("Report Errors", "https://t.me/KINGSTONJK7")]
     ]
 
@@ -694,9 +841,7 @@ async def callback_query_handler(event):
         sessions[user_id] = 'deleteword'
         
     elif event.data == b'logout':
-        await odb.remove_session(user_id)
-        user_data = await odb.get_data(user_id)
-        if user_data and user_data.get("session") is None:
+        if await odb.remove_session(user_id):
             await event.respond("Logged out and deleted session successfully.")
         else:
             await event.respond("You are not logged in.")
@@ -711,8 +856,7 @@ async def callback_query_handler(event):
 
     elif event.data == b'uploadmethod':
         # Retrieve the user's current upload method (default to Pyrogram)
-        user_data = collection.find_one({'user_id': user_id})
-        current_method = user_data.get('upload_method', 'Pyrogram') if user_data else 'Pyrogram'
+        current_method = await fetch_upload_method(user_id)
         pyrogram_check = " ✅" if current_method == "Pyrogram" else ""
         telethon_check = " ✅" if current_method == "Telethon" else ""
 
@@ -723,40 +867,28 @@ async def callback_query_handler(event):
         ]
         await event.edit("Choose your preferred upload method:\n\n__**Note:** **SpyLib ⚡**, built on Telethon(base), by KINGSTON still in beta.__", buttons=buttons)
 
+    elif event.data == b'faststart':
+        prefs = await user_settings.get(user_id)
+        prefs = await user_settings.update(user_id, faststart=not prefs.faststart)
+        if prefs.faststart:
+            await event.respond("Streamable MP4 **enabled** ✅\n\nVideos are remuxed (no re-encode) so they play before the download finishes.")
+        else:
+            await event.respond("Streamable MP4 **disabled** ❌\n\nVideos are uploaded exactly as downloaded.")
+
     elif event.data == b'pyrogram':
-        save_user_upload_method(user_id, "Pyrogram")
+        await save_user_upload_method(user_id, "Pyrogram")
         await event.edit("Upload method set to **Pyrogram** ✅")
 
     elif event.data == b'telethon':
-        save_user_upload_method(user_id, "Telethon")
+        await save_user_upload_method(user_id, "Telethon")
         await event.edit("Upload method set to **SpyLib ⚡\n\nThanks for choosing this library as it will help me to analyze the error raise issues on github.** ✅")        
         
     elif event.data == b'reset':
         try:
-            user_id_str = str(user_id)
-            
-            collection.update_one(
-                {"_id": user_id},
-                {"$unset": {
-                    "delete_words": "",
-                    "replacement_words": "",
-                    "watermark_text": "",
-                    "duration_limit": ""
-                }}
+            await user_settings.reset(
+                user_id,
+                ["delete_words", "replacement_words", "rename_tag", "caption", "chat_id"]
             )
-            
-            collection.update_one(
-                {"user_id": user_id},
-                {"$unset": {
-                    "delete_words": "",
-                    "replacement_words": "",
-                    "watermark_text": "",
-                    "duration_limit": ""
-                }}
-            )            
-            user_chat_ids.pop(user_id, None)
-            user_rename_preferences.pop(user_id_str, None)
-            user_caption_preferences.pop(user_id_str, None)
             thumbnail_path = f"{user_id}.jpg"
             if os.path.exists(thumbnail_path):
                 os.remove(thumbnail_path)
@@ -789,13 +921,9 @@ async def save_thumbnail(event):
     # Remove user from pending photos dictionary in both cases
     pending_photos.pop(user_id, None)
 
-def save_user_upload_method(user_id, method):
+async def save_user_upload_method(user_id, method):
     # Save or update the user's preferred upload method
-    collection.update_one(
-        {'user_id': user_id},  # Query
-        {'$set': {'upload_method': method}},  # Update
-        upsert=True  # Create a new document if one doesn't exist
-    )
+    await user_settings.update(user_id, upload_method=method)
 
 @gf.on(events.NewMessage)
 async def handle_user_input(event):
@@ -806,19 +934,19 @@ async def handle_user_input(event):
         if session_type == 'setchat':
             try:
                 chat_id = event.text
-                user_chat_ids[user_id] = chat_id
+                await user_settings.update(user_id, chat_id=chat_id)
                 await event.respond("Chat ID set successfully!")
             except ValueError:
                 await event.respond("Invalid chat ID!")
                 
         elif session_type == 'setrename':
             custom_rename_tag = event.text
-            await set_rename_command(user_id, custom_rename_tag)
+            await user_settings.update(user_id, rename_tag=custom_rename_tag)
             await event.respond(f"Custom rename tag set to: {custom_rename_tag}")
         
         elif session_type == 'setcaption':
             custom_caption = event.text
-            await set_caption_command(user_id, custom_caption)
+            await user_settings.update(user_id, caption=custom_caption)
             await event.respond(f"Custom caption set to: {custom_caption}")
 
         elif session_type == 'setreplacement':
@@ -827,13 +955,13 @@ async def handle_user_input(event):
                 await event.respond("Usage: 'WORD(s)' 'REPLACEWORD'")
             else:
                 word, replace_word = match.groups()
-                delete_words = load_delete_words(user_id)
-                if word in delete_words:
+                prefs = await user_settings.get(user_id)
+                if word in prefs.delete_words:
                     await event.respond(f"The word '{word}' is in the delete set and cannot be replaced.")
                 else:
-                    replacements = load_replacement_words(user_id)
+                    replacements = dict(prefs.replacement_words)
                     replacements[word] = replace_word
-                    save_replacement_words(user_id, replacements)
+                    await user_settings.update(user_id, replacement_words=replacements)
                     await event.respond(f"Replacement saved: '{word}' will be replaced with '{replace_word}'")
 
         elif session_type == 'addsession':
@@ -843,9 +971,8 @@ async def handle_user_input(event):
                 
         elif session_type == 'deleteword':
             words_to_delete = event.message.text.split()
-            delete_words = load_delete_words(user_id)
-            delete_words.update(words_to_delete)
-            save_delete_words(user_id, delete_words)
+            prefs = await user_settings.get(user_id)
+            await user_settings.update(user_id, delete_words=prefs.delete_words.union(words_to_delete))
             await event.respond(f"Words added to delete list: {', '.join(words_to_delete)}")
                
             
@@ -865,35 +992,54 @@ async def lock_command_handler(event):
     
     # Save the channel ID to the MongoDB database
     try:
-        # Insert the channel ID into the collection
-        collection.insert_one({"channel_id": channel_id})
+        await locks.lock(channel_id)
         await event.respond(f"Channel ID {channel_id} locked successfully.")
     except Exception as e:
         await event.respond(f"Error occurred while locking channel ID: {str(e)}")
 
 
-async def handle_large_file(file, sender, edit, caption):
+@gf.on(events.NewMessage(incoming=True, pattern='/unlock'))
+async def unlock_command_handler(event):
+    if event.sender_id not in OWNER_ID:
+        return await event.respond("You are not authorized to use this command.")
+
+    try:
+        channel_id = int(event.text.split(' ')[1])
+    except (ValueError, IndexError):
+        return await event.respond("Invalid /unlock command. Use /unlock CHANNEL_ID.")
+
+    try:
+        if await locks.unlock(channel_id):
+            await event.respond(f"Channel ID {channel_id} unlocked successfully.")
+        else:
+            await event.respond(f"Channel ID {channel_id} was not locked.")
+    except Exception as e:
+        await event.respond(f"Error occurred while unlocking channel ID: {str(e)}")
+
+
+async def handle_large_file(file, sender, edit, caption, prefs, source=None, userbot=None, turn=None):
+    """Upload through the 4GB session to LOG_GROUP and copy on; returns the LOG_GROUP message id.
+
+    FloodWait propagates so a batch `turn` can retry the copy.
+    """
     if pro is None:
         await edit.edit('**__ ❌ 4GB trigger not found__**')
         os.remove(file)
         gc.collect()
-        return
+        return None
     
     dm = None
     
     print("4GB connector found.")
     await edit.edit('**__ ✅ 4GB trigger connected...__**\n\n')
     
-    target_chat_id = user_chat_ids.get(sender, sender)
+    target_chat_id = prefs.chat_id or sender
     file_extension = str(file).split('.')[-1].lower()
-    metadata = video_metadata(file)
+    metadata = await video_metadata(file)
     duration = metadata['duration']
     width = metadata['width']
     height = metadata['height']
-    try:
-        thumb_path = await screenshot(file, duration, sender)
-    except Exception:
-        thumb_path = None
+    thumb_path = await get_thumbnail(file, sender, duration, source, userbot)
     try:
         if file_extension in VIDEO_EXTENSIONS:
             dm = await pro.send_video(
@@ -935,7 +1081,8 @@ async def handle_large_file(file, sender, edit, caption):
                     [InlineKeyboardButton("💎 Get Premium to Forward", url="https://t.me/KINGSTONJK7")]
                 ]
             )
-            await app.copy_message(
+            await deliver(
+                turn, app.copy_message,
                 target_chat_id,
                 from_chat,
                 msg_id,
@@ -944,25 +1091,28 @@ async def handle_large_file(file, sender, edit, caption):
             )
         else:
             # Simple copy without protect_content or reply_markup
-            await app.copy_message(
+            await deliver(
+                turn, app.copy_message,
                 target_chat_id,
                 from_chat,
                 msg_id
             )
             
+    except FloodWait:
+        raise
     except Exception as e:
         print(f"Error while sending file: {e}")
+        dm = None
 
     finally:
         await edit.delete()
         os.remove(file)
         gc.collect()
-        return
+    return dm.id if dm else None
 
-async def rename_file(file, sender):
-    delete_words = load_delete_words(sender)
-    custom_rename_tag = get_user_rename_preference(sender)
-    replacements = load_replacement_words(sender)
+async def get_renamed_name(file, sender, prefs):
+    """Build the final file name for `file` from the user's rename settings."""
+    custom_rename_tag = prefs.rename_tag
     
     # Get the original filename without path
     original_name = os.path.basename(file)
@@ -983,15 +1133,18 @@ async def rename_file(file, sender):
         file_extension = 'mp4'  # Default extension
         
     # Apply word replacements and deletions
-    for word in delete_words:
+    for word in prefs.delete_words:
         original_file_name = original_file_name.replace(word, "")
     
-    for word, replace_word in replacements.items():
+    for word, replace_word in prefs.replacement_words.items():
         original_file_name = original_file_name.replace(word, replace_word)
     
     # Create new filename with custom tag
     new_file_name = f"{original_file_name} {custom_rename_tag}.{file_extension}"
-    new_file_name = sanitize_filename(new_file_name)
+    return sanitize_filename(new_file_name)
+
+async def rename_file(file, sender, prefs):
+    new_file_name = await get_renamed_name(file, sender, prefs)
     
     # Get full new path
     dir_path = os.path.dirname(file)
@@ -1149,41 +1302,17 @@ def dl_progress_callback(done, total, user_id):
 
 # split function .... ?( to handle gareeb bot coder jo string n lga paaye)
 
-async def split_and_upload_file(app, sender, target_chat_id, file_path, caption, topic_id):
+async def split_and_upload_file(app, sender, target_chat_id, file_path, caption, topic_id, turn=None):
     if not os.path.exists(file_path):
         await app.send_message(sender, "❌ File not found!")
         return
 
     file_size = os.path.getsize(file_path)
     start = await app.send_message(sender, f"ℹ️ File size: {file_size / (1024 * 1024):.2f} MB")
-    PART_SIZE =  1.9 * 1024 * 1024 * 1024
-
-    part_number = 0
-    async with aiofiles.open(file_path, mode="rb") as f:
-        while True:
-            chunk = await f.read(PART_SIZE)
-            if not chunk:
-                break
-
-            # Create part filename
-            base_name, file_ext = os.path.splitext(file_path)
-            part_file = f"{base_name}.part{str(part_number).zfill(3)}{file_ext}"
-
-            # Write part to file
-            async with aiofiles.open(part_file, mode="wb") as part_f:
-                await part_f.write(chunk)
-
-            # Uploading part
-            edit = await app.send_message(target_chat_id, f"⬆️ Uploading part {part_number + 1}...")
-            part_caption = f"{caption} \n\n**Part : {part_number + 1}**"
-            await app.send_document(target_chat_id, document=part_file, caption=part_caption, reply_to_message_id=topic_id,
-                progress=progress_bar,
-                progress_args=("╭─────────────────────╮\n│      **__Pyro Uploader__**\n├─────────────────────", edit, time.time())
-            )
-            await edit.delete()
-            os.remove(part_file)  # Cleanup after upload
-
-            part_number += 1
-
+    # Parts are read in place from the original file, no .partNNN copies.
+    # They upload to LOG_GROUP concurrently, then reach the target in order.
+    parts = await upload_file_parts(app, sender, file_path, caption)
+    for part in parts:
+        await deliver(turn, app.copy_message, target_chat_id, LOG_GROUP, part.id, reply_to_message_id=topic_id)
     await start.delete()
     os.remove(file_path)
\ No newline at end of file
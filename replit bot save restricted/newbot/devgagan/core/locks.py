@@ -0,0 +1,44 @@
+# ---------------------------------------------------
+# File Name: locks.py
+# Description: A Pyrogram bot for downloading files from Telegram channels or groups
+#              and uploading them back to Telegram.
+# Author: Gagan
+# GitHub: https://github.com/devgaganin/
+# Telegram: https://t.me/team_spy_pro
+# YouTube: https://youtube.com/@dev_gagan
+# Created: 2025-01-11
+# Last Modified: 2025-01-11
+# Version: 2.0.5
+# License: MIT License
+# In-process mirror of the locked channel collection
+# ---------------------------------------------------
+
+from devgagan.core.mongo import locks_db, settings_db
+
+# Channel ids owners protected with /lock; checked on every link without a DB hit
+locked_channels = set()
+
+
+async def load_locked_channels():
+    """Fill the in-process set at startup, moving old-style locks over first."""
+    legacy = await settings_db.get_legacy_locked_channels()
+    if legacy:
+        await locks_db.add_locked_channels(legacy)
+        await settings_db.delete_legacy_locked_channels()
+    locked_channels.clear()
+    locked_channels.update(await locks_db.get_locked_channels())
+    print(f"Loaded {len(locked_channels)} locked channels.")
+
+
+def is_locked(chat):
+    return chat in locked_channels
+
+
+async def lock(channel_id):
+    await locks_db.lock_channel(channel_id)
+    locked_channels.add(channel_id)
+
+
+async def unlock(channel_id):
+    locked_channels.discard(channel_id)
+    return await locks_db.unlock_channel(channel_id)
@@ -0,0 +1,116 @@
+# ---------------------------------------------------
+# File Name: mediainfo.py
+# Description: A Pyrogram bot for downloading files from Telegram channels or groups
+#              and uploading them back to Telegram.
+# Author: Gagan
+# GitHub: https://github.com/devgaganin/
+# Telegram: https://t.me/team_spy_pro
+# YouTube: https://youtube.com/@dev_gagan
+# Created: 2025-01-11
+# Last Modified: 2025-01-11
+# Version: 2.0.5
+# License: MIT License
+# ffprobe-based media metadata, probed off the event loop and cached,
+# plus the limit every ffmpeg run shares
+# ---------------------------------------------------
+
+import asyncio
+import json
+import os
+from collections import OrderedDict
+from config import FFPROBE_CONCURRENCY, FFMPEG_CONCURRENCY
+
+DEFAULT_METADATA = {'width': 1, 'height': 1, 'duration': 1, 'codec': None, 'bitrate': 0}
+PROBE_TIMEOUT = 60
+CACHE_SIZE = 512
+
+_probe_slots = asyncio.Semaphore(FFPROBE_CONCURRENCY)
+# Held around every thumbnail grab so a busy batch can't swamp the CPU
+ffmpeg_slots = asyncio.Semaphore(FFMPEG_CONCURRENCY)
+# (path, size, mtime_ns) -> metadata dict, most recently used last
+_cache = OrderedDict()
+
+
+def _number(*values):
+    for value in values:
+        try:
+            if value not in (None, "", "N/A"):
+                return float(value)
+        except (TypeError, ValueError):
+            continue
+    return 0
+
+
+def _rotation(stream):
+    rotate = (stream.get("tags") or {}).get("rotate")
+    for side_data in stream.get("side_data_list") or []:
+        if "rotation" in side_data:
+            rotate = side_data["rotation"]
+    try:
+        return abs(int(float(rotate))) % 180 == 90
+    except (TypeError, ValueError):
+        return False
+
+
+def parse_probe(data):
+    """Pick width/height/duration/codec/bitrate out of ffprobe's JSON."""
+    streams = data.get("streams") or []
+    fmt = data.get("format") or {}
+    video = next(
+        (s for s in streams if s.get("codec_type") == "video" and not (s.get("disposition") or {}).get("attached_pic")),
+        None
+    )
+    main = video or next((s for s in streams if s.get("codec_type") == "audio"), {})
+    width = int(video.get("width") or 0) if video else 0
+    height = int(video.get("height") or 0) if video else 0
+    if video and _rotation(video):
+        width, height = height, width
+    duration = round(_number(fmt.get("duration"), main.get("duration")))
+    return {
+        'width': width or DEFAULT_METADATA['width'],
+        'height': height or DEFAULT_METADATA['height'],
+        'duration': duration or DEFAULT_METADATA['duration'],
+        'codec': main.get("codec_name"),
+        'bitrate': int(_number(fmt.get("bit_rate"), main.get("bit_rate")))
+    }
+
+
+async def _run_ffprobe(path):
+    async with _probe_slots:
+        process = await asyncio.create_subprocess_exec(
+            "ffprobe", "-v", "error", "-print_format", "json", "-show_format", "-show_streams", path,
+            stdout=asyncio.subprocess.PIPE,
+            stderr=asyncio.subprocess.PIPE
+        )
+        try:
+            stdout, stderr = await asyncio.wait_for(process.communicate(), PROBE_TIMEOUT)
+        except asyncio.TimeoutError:
+            process.kill()
+            await process.wait()
+            raise
+    if process.returncode != 0:
+        raise RuntimeError(stderr.decode(errors="ignore").strip() or f"ffprobe exited with {process.returncode}")
+    return json.loads(stdout or b"{}")
+
+
+async def probe(path):
+    """Metadata for `path`; failures fall back to DEFAULT_METADATA so uploads never fail on a probe."""
+    try:
+        st = os.stat(path)
+    except OSError as e:
+        print(f"Error probing {path}: {e}")
+        return dict(DEFAULT_METADATA)
+    key = (os.path.abspath(path), st.st_size, st.st_mtime_ns)
+    cached = _cache.get(key)
+    if cached:
+        _cache.move_to_end(key)
+        return dict(cached)
+    try:
+        metadata = parse_probe(await _run_ffprobe(path))
+    except Exception as e:
+        print(f"Error probing {path}: {e}")
+        return dict(DEFAULT_METADATA)
+    _cache[key] = metadata
+    while len(_cache) > CACHE_SIZE:
+        _cache.popitem(last=False)
+    return dict(metadata)
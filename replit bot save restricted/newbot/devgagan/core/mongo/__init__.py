@@ -4,5 +4,30 @@
 #              and uploading them back to Telegram.
 
 from motor.motor_asyncio import AsyncIOMotorClient
+from config import (
+    MONGO_DB, MONGO_MAX_POOL, MONGO_MIN_POOL, MONGO_MAX_IDLE_MS,
+    MONGO_CONNECT_TIMEOUT_MS, MONGO_SERVER_SELECTION_TIMEOUT_MS, MONGO_SOCKET_TIMEOUT_MS
+)
+from devgagan.core.mongo.metrics import command_metrics
 
-client = AsyncIOMotorClient("mongodb://localhost:27017/")
\ No newline at end of file
+_client = None
+
+
+def get_client():
+    """The one Motor client of the process; every collection handle comes from it."""
+    global _client
+    if _client is None:
+        _client = AsyncIOMotorClient(
+            MONGO_DB,
+            maxPoolSize=MONGO_MAX_POOL,
+            minPoolSize=MONGO_MIN_POOL,
+            maxIdleTimeMS=MONGO_MAX_IDLE_MS,
+            connectTimeoutMS=MONGO_CONNECT_TIMEOUT_MS,
+            serverSelectionTimeoutMS=MONGO_SERVER_SELECTION_TIMEOUT_MS,
+            socketTimeoutMS=MONGO_SOCKET_TIMEOUT_MS,
+            event_listeners=[command_metrics]
+        )
+    return _client
+
+
+client = get_client()
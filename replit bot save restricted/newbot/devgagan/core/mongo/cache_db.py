@@ -0,0 +1,36 @@
+# ---------------------------------------------------
+# File Name: cache_db.py
+# Description: A Pyrogram bot for downloading files from Telegram channels or groups 
+#              and uploading them back to Telegram.
+
+
+import datetime
+from devgagan.core.mongo import client as mongo
+from config import FILE_CACHE_TTL_DAYS
+
+db = mongo.cache
+db = db.file_cache
+
+
+async def create_cache_indexes():
+    await db.create_index("last_used", expireAfterSeconds=FILE_CACHE_TTL_DAYS * 86400)
+
+
+async def get_entry(key):
+    return await db.find_one({"_id": key})
+
+
+async def set_entry(key, log_msg_id, file_name):
+    await db.update_one(
+        {"_id": key},
+        {"$set": {"log_msg_id": log_msg_id, "file_name": file_name, "last_used": datetime.datetime.utcnow()}},
+        upsert=True
+    )
+
+
+async def touch_entry(key):
+    await db.update_one({"_id": key}, {"$set": {"last_used": datetime.datetime.utcnow()}})
+
+
+async def delete_entry(key):
+    await db.delete_one({"_id": key})
@@ -4,9 +4,8 @@
 #              and uploading them back to Telegram.
 # ---------------------------------------------------
 
-from devgagan.core.mongo import client  # or wherever your MongoDB client is defined
-from config import MONGO_DB
-from motor.motor_asyncio import AsyncIOMotorClient as MongoCli
+from devgagan.core.mongo import client
+from devgagan.core.settings import user_settings
 from pyrogram import Client, filters
 from pyrogram.types import Message, InlineKeyboardButton, InlineKeyboardMarkup
 import re
@@ -15,22 +14,17 @@ import asyncio
 import string
 import random
 
-# ✅ Use your actual database name
-db = client.user_data  # or client.users
-
-# ✅ Collection where sessions will be saved
-sessions_collection = db.sessions  # You can rename this based on what Compass shows
-
-# ✅ Function to save session
+# Sessions live on the user's profile (see settings_db)
 async def set_session(user_id, string_session):
-    await sessions_collection.update_one(
-        {"user_id": user_id},
-        {"$set": {"string_session": string_session}},
-        upsert=True
-    )
+    await user_settings.update(user_id, session=string_session)
+
+async def remove_session(user_id):
+    """Drop the stored session; True if there was one."""
+    had_session = (await user_settings.get(user_id)).session is not None
+    await user_settings.reset(user_id, ["session"])
+    return had_session
 
-mongo = MongoCli(MONGO_DB)
-db = mongo.user_data.users_data_db
+db = client.user_data.users_data_db
 
 app = Client("my_bot")
 
@@ -0,0 +1,59 @@
+# ---------------------------------------------------
+# File Name: jobs_db.py
+# Description: A Pyrogram bot for downloading files from Telegram channels or groups
+#              and uploading them back to Telegram.
+
+
+import datetime
+from devgagan.core.mongo import client as mongo
+
+db = mongo.jobs
+db = db.batch_jobs
+
+# running -> done | cancelled | failed; jobs still `running` at boot were cut off by a restart
+RUNNING = "running"
+
+
+async def create_jobs_indexes():
+    await db.create_index("status")
+    await db.create_index([("user_id", 1), ("created_at", -1)])
+
+
+async def create_job(user_id, base_link, start_id, count, pin_msg_id):
+    now = datetime.datetime.utcnow()
+    job = {
+        "user_id": user_id,
+        "base_link": base_link,
+        "start_id": start_id,
+        "count": count,
+        "delivered": 0,
+        "pin_msg_id": pin_msg_id,
+        "status": RUNNING,
+        "created_at": now,
+        "updated_at": now
+    }
+    job["_id"] = (await db.insert_one(job)).inserted_id
+    return job
+
+
+async def checkpoint(job_id, delivered):
+    """Record that the first `delivered` items of the job have been handled."""
+    await db.update_one(
+        {"_id": job_id},
+        {"$max": {"delivered": delivered}, "$set": {"updated_at": datetime.datetime.utcnow()}}
+    )
+
+
+async def finish(job_id, status, error=None):
+    await db.update_one(
+        {"_id": job_id},
+        {"$set": {"status": status, "error": error, "updated_at": datetime.datetime.utcnow()}}
+    )
+
+
+async def get_running_jobs():
+    return await db.find({"status": RUNNING}).to_list(length=None)
+
+
+async def get_user_jobs(user_id, limit=5):
+    return await db.find({"user_id": user_id}).sort("created_at", -1).to_list(length=limit)
@@ -0,0 +1,32 @@
+# ---------------------------------------------------
+# File Name: locks_db.py
+# Description: A Pyrogram bot for downloading files from Telegram channels or groups
+#              and uploading them back to Telegram.
+
+
+from devgagan.core.mongo import client as mongo
+from pymongo import UpdateOne
+
+db = mongo.smart_users
+db = db.locked_channels
+
+
+async def get_locked_channels():
+    return {doc["_id"] async for doc in db.find({}, {"_id": 1})}
+
+
+async def add_locked_channels(channel_ids):
+    if channel_ids:
+        await db.bulk_write(
+            [UpdateOne({"_id": cid}, {"$setOnInsert": {"_id": cid}}, upsert=True) for cid in channel_ids],
+            ordered=False
+        )
+
+
+async def lock_channel(channel_id):
+    await db.update_one({"_id": channel_id}, {"$setOnInsert": {"_id": channel_id}}, upsert=True)
+
+
+async def unlock_channel(channel_id):
+    result = await db.delete_one({"_id": channel_id})
+    return result.deleted_count > 0
@@ -0,0 +1,89 @@
+# ---------------------------------------------------
+# File Name: metrics.py
+# Description: A Pyrogram bot for downloading files from Telegram channels or groups
+#              and uploading them back to Telegram.
+
+
+import bisect
+import threading
+from pymongo import monitoring
+
+# Upper bounds in milliseconds; the last bucket catches everything slower
+BUCKETS_MS = (1, 2, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000)
+IGNORED = {"hello", "ismaster", "isMaster", "ping", "endSessions", "saslStart", "saslContinue", "buildInfo"}
+
+
+class OpStats:
+    def __init__(self):
+        self.count = 0
+        self.errors = 0
+        self.total_ms = 0.0
+        self.max_ms = 0.0
+        self.buckets = [0] * (len(BUCKETS_MS) + 1)
+
+    def add(self, ms, failed):
+        self.count += 1
+        self.errors += failed
+        self.total_ms += ms
+        self.max_ms = max(self.max_ms, ms)
+        self.buckets[bisect.bisect_left(BUCKETS_MS, ms)] += 1
+
+    def percentile(self, pct):
+        """Upper bound of the bucket holding the pct-th sample."""
+        target = self.count * pct / 100
+        seen = 0
+        for bound, hits in zip(BUCKETS_MS + (None,), self.buckets):
+            seen += hits
+            if seen >= target:
+                return bound if bound is not None else self.max_ms
+        return self.max_ms
+
+
+class CommandMetrics(monitoring.CommandListener):
+    """Latency counters and histograms per (collection, command).
+
+    Every module owns its own collections, so the key points straight at the
+    call site. Listener callbacks run on driver threads, hence the lock.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._inflight = {}
+        self._stats = {}
+
+    def started(self, event):
+        if event.command_name in IGNORED:
+            return
+        # getMore names its collection separately; its own value is a cursor id
+        target = event.command.get("collection") if event.command_name == "getMore" else event.command.get(event.command_name)
+        collection = target if isinstance(target, str) else "-"
+        with self._lock:
+            self._inflight[(event.connection_id, event.request_id)] = f"{event.database_name}.{collection}"
+
+    def _finish(self, event, failed):
+        with self._lock:
+            namespace = self._inflight.pop((event.connection_id, event.request_id), None)
+            if namespace is None:
+                return
+            key = (namespace, event.command_name)
+            stats = self._stats.get(key)
+            if stats is None:
+                stats = self._stats[key] = OpStats()
+            stats.add(event.duration_micros / 1000, failed)
+
+    def succeeded(self, event):
+        self._finish(event, False)
+
+    def failed(self, event):
+        self._finish(event, True)
+
+    def snapshot(self):
+        with self._lock:
+            return sorted(self._stats.items(), key=lambda item: item[1].total_ms, reverse=True)
+
+    def reset(self):
+        with self._lock:
+            self._stats.clear()
+
+
+command_metrics = CommandMetrics()
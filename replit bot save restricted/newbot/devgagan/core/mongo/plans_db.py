@@ -4,23 +4,32 @@
 #              and uploading them back to Telegram.
 
 
+import asyncio
 import datetime
-from motor.motor_asyncio import AsyncIOMotorClient as MongoCli
-from config import MONGO_DB
+from config import PREMIUM_REFRESH
+from devgagan.core.mongo import client as mongo
+from devgagan.core.premium import entitlements
  
-mongo = MongoCli(MONGO_DB)
 db = mongo.premium
+removed_db = db.premium_removed
 db = db.premium_db
+
+# Removal markers only need to outlive one refresh on every instance
+REMOVED_TTL = 24 * 60 * 60
  
 async def add_premium(user_id, expire_date):
+    updated_at = datetime.datetime.now()
     data = await check_premium(user_id)
     if data and data.get("_id"):
-        await db.update_one({"_id": user_id}, {"$set": {"expire_date": expire_date}})
+        await db.update_one({"_id": user_id}, {"$set": {"expire_date": expire_date, "updated_at": updated_at}})
     else:
-        await db.insert_one({"_id": user_id, "expire_date": expire_date})
+        await db.insert_one({"_id": user_id, "expire_date": expire_date, "updated_at": updated_at})
+    entitlements.grant(user_id, expire_date)
  
 async def remove_premium(user_id):
     await db.delete_one({"_id": user_id})
+    await removed_db.update_one({"_id": user_id}, {"$set": {"updated_at": datetime.datetime.now()}}, upsert=True)
+    entitlements.revoke(user_id)
  
 async def check_premium(user_id):
     return await db.find_one({"_id": user_id})
@@ -31,11 +40,69 @@ async def premium_users():
         id_list.append(data["_id"])
     return id_list
  
+async def load_entitlements(quiet=False):
+    plans = {}
+    entitlements.begin_load()
+    try:
+        async for data in db.find({}, {"expire_date": 1}):
+            plans[data["_id"]] = data.get("expire_date")
+    except BaseException:
+        entitlements.abort_load()
+        raise
+    entitlements.load(plans)
+    if not quiet:
+        print(f"Loaded {len(plans)} premium plans.")
+
+async def refresh_entitlements(interval=PREMIUM_REFRESH):
+    """Pick up /add and /rem done on other instances.
+
+    Only plans and removal markers written since the previous round are read.
+    Each round looks back one extra interval so clock skew between instances
+    does not drop a change; replaying one twice is harmless.
+    """
+    overlap = datetime.timedelta(seconds=interval)
+    since = datetime.datetime.now() - overlap
+    while True:
+        await asyncio.sleep(interval)
+        started = datetime.datetime.now()
+        try:
+            changed = {"updated_at": {"$gte": since}}
+            changes = [
+                (data["updated_at"], data["_id"], data.get("expire_date"))
+                async for data in db.find(changed, {"expire_date": 1, "updated_at": 1})
+            ]
+            removals = [
+                (data["updated_at"], data["_id"])
+                async for data in removed_db.find(changed)
+            ]
+        except Exception as e:
+            print(f"Error refreshing premium plans: {e}")
+            continue
+        since = started - overlap
+        # The newest write for a user wins, whichever collection it is in
+        events = [(at, user_id, True, expire_date) for at, user_id, expire_date in changes]
+        events += [(at, user_id, False, None) for at, user_id in removals]
+        for _, user_id, granted, expire_date in sorted(events, key=lambda event: event[0]):
+            if granted:
+                entitlements.grant(user_id, expire_date)
+            else:
+                entitlements.revoke(user_id)
+ 
+async def create_plans_indexes():
+    await db.create_index("expire_date")
+    await db.create_index("updated_at")
+    await removed_db.create_index("updated_at", expireAfterSeconds=REMOVED_TTL)
+ 
 async def check_and_remove_expired_users():
-    current_time = datetime.datetime.utcnow()
-    async for data in db.find():
-        expire_date = data.get("expire_date")
-        if expire_date and expire_date < current_time:
-            await remove_premium(data["_id"])
-            print(f"Removed user {data['_id']} due to expired plan.")
- 
\ No newline at end of file
+    """Delete every plan past its expiry in one go; returns the removed user ids.
+
+    Expiry dates are written with datetime.now() by /add, so compare on that clock.
+    Cached entitlements drop the same users by themselves through their heap.
+    """
+    current_time = datetime.datetime.now()
+    expired = {"expire_date": {"$lte": current_time}}
+    user_ids = [data["_id"] async for data in db.find(expired, {"_id": 1})]
+    if user_ids:
+        await db.delete_many({"_id": {"$in": user_ids}, **expired})
+        print(f"Removed {len(user_ids)} users due to expired plans.")
+    return user_ids
@@ -0,0 +1,89 @@
+# ---------------------------------------------------
+# File Name: settings_db.py
+# Description: A Pyrogram bot for downloading files from Telegram channels or groups
+#              and uploading them back to Telegram.
+
+
+from pymongo import UpdateOne
+from devgagan.core.mongo import client as mongo
+
+db = mongo.smart_users
+meta = db.meta
+legacy = db.super_user
+db = db.profiles
+
+# Older layouts: upload method and word lists in smart_users.super_user (keyed
+# by `user_id` and `_id` respectively), sessions in user_data
+legacy_users_data = mongo.user_data.users_data_db
+legacy_sessions = mongo.user_data.sessions
+
+PROFILE_FIELDS = (
+    "session", "upload_method", "delete_words", "replacement_words", "rename_tag", "caption", "chat_id",
+    "faststart"
+)
+PROFILE_PROJECTION = {field: 1 for field in PROFILE_FIELDS}
+MIGRATION_ID = "profiles_v1"
+
+
+async def get_profile(user_id):
+    return await db.find_one({"_id": user_id}, PROFILE_PROJECTION)
+
+
+async def set_fields(user_id, fields):
+    await db.update_one({"_id": user_id}, {"$set": fields}, upsert=True)
+
+
+async def unset_fields(user_id, keys):
+    await db.update_one({"_id": user_id}, {"$unset": {key: "" for key in keys}})
+
+
+async def _flush(ops):
+    if ops:
+        await db.bulk_write(ops, ordered=False)
+        ops.clear()
+
+
+async def migrate_legacy_profiles(batch=1000):
+    """Fold the old per-store settings into one profile document per user.
+
+    Runs once; sources are applied oldest first so that the store the bot
+    actually read from wins when a field exists in more than one place.
+    """
+    if await meta.find_one({"_id": MIGRATION_ID}):
+        return
+    sources = [
+        (legacy_sessions, {"user_id": {"$exists": True}, "string_session": {"$exists": True}},
+         lambda doc: (doc["user_id"], {"session": doc["string_session"]})),
+        (legacy_users_data, {"session": {"$exists": True}},
+         lambda doc: (doc["_id"], {"session": doc["session"]})),
+        (legacy, {"user_id": {"$exists": True}, "upload_method": {"$exists": True}},
+         lambda doc: (doc["user_id"], {"upload_method": doc["upload_method"]})),
+        (legacy, {"channel_id": {"$exists": False}, "user_id": {"$exists": False}},
+         lambda doc: (doc["_id"], {key: doc[key] for key in ("delete_words", "replacement_words") if key in doc})),
+    ]
+    moved = 0
+    ops = []
+    for collection, query, convert in sources:
+        async for doc in collection.find(query):
+            user_id, fields = convert(doc)
+            if not fields:
+                continue
+            ops.append(UpdateOne({"_id": user_id}, {"$set": fields}, upsert=True))
+            moved += 1
+            if len(ops) >= batch:
+                await _flush(ops)
+    await _flush(ops)
+    await meta.update_one({"_id": MIGRATION_ID}, {"$set": {"done": True}}, upsert=True)
+    print(f"Migrated {moved} legacy settings records into profiles.")
+
+
+async def get_legacy_locked_channels():
+    """Channel locks written by older versions into smart_users.super_user."""
+    channel_ids = set()
+    async for doc in legacy.find({"channel_id": {"$exists": True}}, {"channel_id": 1}):
+        channel_ids.add(doc["channel_id"])
+    return channel_ids
+
+
+async def delete_legacy_locked_channels():
+    await legacy.delete_many({"channel_id": {"$exists": True}})
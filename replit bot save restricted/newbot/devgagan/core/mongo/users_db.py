@@ -4,43 +4,55 @@
 #              and uploading them back to Telegram.
 
 
-from config import MONGO_DB
-from motor.motor_asyncio import AsyncIOMotorClient as MongoCli
+from devgagan.core.mongo import client as mongo
+from pymongo import UpdateOne
+from pymongo.errors import OperationFailure
 
 
-mongo = MongoCli(MONGO_DB)
 db = mongo.users
 db = db.users_db
 
 
+async def create_users_indexes():
+  try:
+    await db.users.create_index("user", unique=True)
+  except OperationFailure:
+    # Older deployments could insert the same user twice; keep one row per
+    # user so the unique index can be built.
+    async for dup in db.users.aggregate([
+      {"$group": {"_id": "$user", "ids": {"$push": "$_id"}, "count": {"$sum": 1}}},
+      {"$match": {"count": {"$gt": 1}}}
+    ], allowDiskUse=True):
+      await db.users.delete_many({"_id": {"$in": dup["ids"][1:]}})
+    await db.users.create_index("user", unique=True)
+
+
 async def get_users():
   user_list = []
-  async for user in db.users.find({"user": {"$gt": 0}}):
+  async for user in db.users.find({"user": {"$gt": 0}}, {"_id": 0, "user": 1}):
     user_list.append(user['user'])
   return user_list
 
 
+async def count_users():
+  return await db.users.count_documents({"user": {"$gt": 0}})
+
+
 async def get_user(user):
-  users = await get_users()
-  if user in users:
-    return True
-  else:
-    return False
+  return await db.users.find_one({"user": user}, {"_id": 1}) is not None
+
 
 async def add_user(user):
-  users = await get_users()
-  if user in users:
-    return
-  else:
-    await db.users.insert_one({"user": user})
+  await db.users.update_one({"user": user}, {"$setOnInsert": {"user": user}}, upsert=True)
 
 
-async def del_user(user):
-  users = await get_users()
-  if not user in users:
-    return
-  else:
-    await db.users.delete_one({"user": user})
-    
+async def add_users(users):
+  if users:
+    await db.users.bulk_write(
+      [UpdateOne({"user": user}, {"$setOnInsert": {"user": user}}, upsert=True) for user in users],
+      ordered=False
+    )
 
 
+async def del_user(user):
+  await db.users.delete_one({"user": user})
@@ -0,0 +1,51 @@
+# ---------------------------------------------------
+# File Name: notifier.py
+# Description: A Pyrogram bot for downloading files from Telegram channels or groups
+#              and uploading them back to Telegram.
+# Author: Gagan
+# GitHub: https://github.com/devgaganin/
+# Telegram: https://t.me/team_spy_pro
+# YouTube: https://youtube.com/@dev_gagan
+# Created: 2025-01-11
+# Last Modified: 2025-01-11
+# Version: 2.0.5
+# License: MIT License
+# Rate-limited background sender for bot notices
+# ---------------------------------------------------
+
+import asyncio
+from pyrogram.errors import FloodWait
+from devgagan import app
+from config import NOTIFY_RATE
+
+
+class Notifier:
+    """Queue of (chat_id, text) sent one at a time at no more than `rate` per second."""
+
+    def __init__(self, rate, max_retries=3):
+        self.interval = 1 / max(rate, 1)
+        self.max_retries = max_retries
+        self._queue = asyncio.Queue()
+
+    def send(self, chat_id, text):
+        self._queue.put_nowait((chat_id, text))
+
+    async def _deliver(self, chat_id, text):
+        for _ in range(self.max_retries):
+            try:
+                await app.send_message(chat_id, text)
+                return
+            except FloodWait as fw:
+                await asyncio.sleep(fw.value)
+            except Exception as e:
+                print(f"Notice to {chat_id} failed: {e}")
+                return
+
+    async def run(self):
+        while True:
+            chat_id, text = await self._queue.get()
+            await self._deliver(chat_id, text)
+            await asyncio.sleep(self.interval)
+
+
+notifier = Notifier(NOTIFY_RATE)
@@ -0,0 +1,86 @@
+# ---------------------------------------------------
+# File Name: premium.py
+# Description: A Pyrogram bot for downloading files from Telegram channels or groups
+#              and uploading them back to Telegram.
+# Author: Gagan
+# GitHub: https://github.com/devgaganin/
+# Telegram: https://t.me/team_spy_pro
+# YouTube: https://youtube.com/@dev_gagan
+# Created: 2025-01-11
+# Last Modified: 2025-01-11
+# Version: 2.0.5
+# License: MIT License
+# In-process premium entitlements with an expiry heap
+# ---------------------------------------------------
+
+import datetime
+import heapq
+
+_REVOKED = object()
+
+
+class Entitlements:
+    """Who is premium right now, answered from memory.
+
+    `_expiry` maps user id -> expire_date (None for plans without one). The heap
+    holds (expire_date, user_id) in expiry order; entries left behind by a
+    renewal or removal no longer match `_expiry` and are skipped when popped.
+
+    The whole map is loaded from Mongo at startup; local grants and revokes
+    made while that load is reading are replayed on top of it so they are not
+    lost. Changes made on other instances arrive later through grant/revoke.
+    """
+
+    def __init__(self):
+        self._expiry = {}
+        self._heap = []
+        self._changes = None  # user_id -> expire_date or _REVOKED while a reload runs
+
+    def begin_load(self):
+        self._changes = {}
+
+    def abort_load(self):
+        self._changes = None
+
+    def load(self, plans):
+        expiry = dict(plans)
+        for user_id, expire_date in (self._changes or {}).items():
+            if expire_date is _REVOKED:
+                expiry.pop(user_id, None)
+            else:
+                expiry[user_id] = expire_date
+        self._changes = None
+        self._expiry = expiry
+        self._heap = [(exp, uid) for uid, exp in self._expiry.items() if exp is not None]
+        heapq.heapify(self._heap)
+
+    def grant(self, user_id, expire_date):
+        self._expiry[user_id] = expire_date
+        if expire_date is not None:
+            heapq.heappush(self._heap, (expire_date, user_id))
+        if self._changes is not None:
+            self._changes[user_id] = expire_date
+
+    def revoke(self, user_id):
+        self._expiry.pop(user_id, None)
+        if self._changes is not None:
+            self._changes[user_id] = _REVOKED
+
+    def _expire_due(self):
+        # Expiry dates are written with datetime.now() by /add, so compare on that clock
+        now = datetime.datetime.now()
+        while self._heap and self._heap[0][0] <= now:
+            expire_date, user_id = heapq.heappop(self._heap)
+            if self._expiry.get(user_id) == expire_date:
+                del self._expiry[user_id]
+
+    def is_premium(self, user_id):
+        self._expire_due()
+        return user_id in self._expiry
+
+    def __len__(self):
+        self._expire_due()
+        return len(self._expiry)
+
+
+entitlements = Entitlements()
@@ -0,0 +1,86 @@
+# ---------------------------------------------------
+# File Name: relay.py
+# Description: A Pyrogram bot for downloading files from Telegram channels or groups
+#              and uploading them back to Telegram.
+# Author: Gagan
+# GitHub: https://github.com/devgaganin/
+# Telegram: https://t.me/team_spy_pro
+# YouTube: https://youtube.com/@dev_gagan
+# Created: 2025-01-11
+# Last Modified: 2025-01-11
+# Version: 2.0.5
+# License: MIT License
+# Disk-less relay from the userbot's media stream to the Telethon uploader
+# ---------------------------------------------------
+
+import asyncio
+from config import RELAY_BUFFER_MB
+
+STREAM_CHUNK_SIZE = 1024 * 1024  # Pyrogram's stream_media yields 1 MB chunks
+BOT_UPLOAD_LIMIT = 2 * 1024 * 1024 * 1024
+
+
+class RelayError(Exception):
+    """The relay failed before anything reached the target chat; the disk path can retry."""
+
+
+def can_relay(msg, file_size):
+    """Only plain documents/videos with a known size the bot itself may upload."""
+    return bool((msg.video or msg.document) and 0 < file_size <= BOT_UPLOAD_LIMIT)
+
+
+class RelayStream:
+    """Async file-like reader fed by `userbot.stream_media` through a bounded ring of chunks.
+
+    Telethon's `upload_file` awaits `read()` when it returns a coroutine, so parts
+    go straight from the download stream into the upload without touching disk.
+    """
+
+    def __init__(self, userbot, msg, size, name):
+        self.userbot = userbot
+        self.msg = msg
+        self.size = size
+        self.name = name
+        self._ring = asyncio.Queue(max(RELAY_BUFFER_MB * 1024 * 1024 // STREAM_CHUNK_SIZE, 1))
+        self._buffer = bytearray()
+        self._eof = False
+        self._error = None
+        self._task = None
+
+    def start(self):
+        self._task = asyncio.create_task(self._pump())
+        return self
+
+    async def _pump(self):
+        try:
+            async for chunk in self.userbot.stream_media(self.msg):
+                await self._ring.put(chunk)
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            self._error = e
+        await self._ring.put(None)
+
+    async def read(self, n=-1):
+        while not self._eof and (n < 0 or len(self._buffer) < n):
+            chunk = await self._ring.get()
+            if chunk is None:
+                self._eof = True
+                if self._error:
+                    raise self._error
+                break
+            self._buffer += chunk
+        if n < 0 or n > len(self._buffer):
+            n = len(self._buffer)
+        data = bytes(self._buffer[:n])
+        del self._buffer[:n]
+        return data
+
+    async def close(self):
+        if self._task and not self._task.done():
+            self._task.cancel()
+            try:
+                await self._task
+            except (asyncio.CancelledError, Exception):
+                pass
+        self._buffer.clear()
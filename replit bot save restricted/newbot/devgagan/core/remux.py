@@ -0,0 +1,114 @@
+# ---------------------------------------------------
+# File Name: remux.py
+# Description: A Pyrogram bot for downloading files from Telegram channels or groups
+#              and uploading them back to Telegram.
+# Author: Gagan
+# GitHub: https://github.com/devgaganin/
+# Telegram: https://t.me/team_spy_pro
+# YouTube: https://youtube.com/@dev_gagan
+# Created: 2025-01-11
+# Last Modified: 2025-01-11
+# Version: 2.0.5
+# License: MIT License
+# Codec-copy remux into a faststart MP4 so clients can stream before the download ends
+# ---------------------------------------------------
+
+import asyncio
+import os
+import struct
+from config import FASTSTART_MAX_MB, REMUX_WORKERS
+from devgagan.core.staging import admission
+
+REMUX_TIMEOUT = 900
+
+_remux_slots = asyncio.Semaphore(REMUX_WORKERS)
+_remux_bytes = 0  # output bytes of remuxes currently being written
+
+
+def is_faststart(path):
+    """True when `path` is an MP4 whose moov atom comes before mdat."""
+    try:
+        with open(path, "rb") as f:
+            while True:
+                header = f.read(8)
+                if len(header) < 8:
+                    return False
+                size, kind = struct.unpack(">I4s", header)
+                if kind == b"moov":
+                    return True
+                if kind == b"mdat":
+                    return False
+                if size == 1:
+                    size = struct.unpack(">Q", f.read(8))[0] - 8
+                elif size == 0:
+                    return False
+                if size < 8:
+                    return False
+                f.seek(size - 8, os.SEEK_CUR)
+    except OSError:
+        return False
+
+
+def _has_room(size):
+    # admission.available() already leaves out the reserve and bytes promised to
+    # in-flight downloads; other running remuxes are subtracted on top
+    return admission.available() - _remux_bytes > size
+
+
+async def faststart(path):
+    """Remux `path` in place; any failure leaves the original file untouched.
+
+    Only `.mp4` targets under FASTSTART_MAX_MB are considered, and files that
+    already carry moov up front are skipped without spawning ffmpeg.
+    """
+    if not path.lower().endswith(".mp4"):
+        return path
+    try:
+        size = os.path.getsize(path)
+    except OSError:
+        return path
+    if size > FASTSTART_MAX_MB * 1024 * 1024 or is_faststart(path):
+        return path
+    out = path + ".faststart"
+    cmd = [
+        "ffmpeg", "-v", "error", "-i", path,
+        "-map", "0:v", "-map", "0:a?", "-c", "copy", "-sn", "-dn",
+        "-movflags", "+faststart", "-f", "mp4", "-y", out
+    ]
+    global _remux_bytes
+    async with _remux_slots:
+        # Checked once a slot is free so the figure covers every remux still running
+        if not _has_room(size):
+            print(f"Skipping faststart remux of {path}: not enough free space")
+            return path
+        _remux_bytes += size
+        try:
+            return await _remux(path, out, cmd)
+        finally:
+            _remux_bytes -= size
+
+
+async def _remux(path, out, cmd):
+    process = await asyncio.create_subprocess_exec(
+        *cmd,
+        stdout=asyncio.subprocess.DEVNULL,
+        stderr=asyncio.subprocess.PIPE
+    )
+    try:
+        _, stderr = await asyncio.wait_for(process.communicate(), REMUX_TIMEOUT)
+    except (asyncio.TimeoutError, asyncio.CancelledError) as e:
+        process.kill()
+        await process.wait()
+        if os.path.exists(out):
+            os.remove(out)
+        if isinstance(e, asyncio.CancelledError):
+            raise
+        print(f"Faststart remux of {path} timed out")
+        return path
+    if process.returncode != 0 or not os.path.exists(out):
+        print(f"Faststart remux failed for {path}: {stderr.decode(errors='ignore').strip()}")
+        if os.path.exists(out):
+            os.remove(out)
+        return path
+    os.replace(out, path)
+    return path
@@ -0,0 +1,105 @@
+# ---------------------------------------------------
+# File Name: settings.py
+# Description: A Pyrogram bot for downloading files from Telegram channels or groups
+#              and uploading them back to Telegram.
+# Author: Gagan
+# GitHub: https://github.com/devgaganin/
+# Telegram: https://t.me/team_spy_pro
+# YouTube: https://youtube.com/@dev_gagan
+# Created: 2025-01-11
+# Last Modified: 2025-01-11
+# Version: 2.0.5
+# License: MIT License
+# Cached per-user settings with write-through to MongoDB
+# ---------------------------------------------------
+
+import time
+from collections import OrderedDict
+from config import SETTINGS_CACHE_TTL, SETTINGS_CACHE_SIZE
+from devgagan.core.mongo import settings_db
+
+
+class UserSettings:
+    """Read-only snapshot of one user's profile."""
+
+    __slots__ = (
+        "user_id", "session", "upload_method", "delete_words", "replacement_words",
+        "rename_tag", "caption", "chat_id", "faststart"
+    )
+
+    def __init__(self, user_id, session=None, upload_method="Pyrogram", delete_words=(),
+                 replacement_words=None, rename_tag="KINGSTON", caption="", chat_id=None, faststart=False):
+        self.user_id = user_id
+        self.session = session
+        self.upload_method = upload_method
+        self.delete_words = frozenset(delete_words)
+        self.replacement_words = dict(replacement_words or {})
+        self.rename_tag = rename_tag
+        self.caption = caption
+        self.chat_id = chat_id
+        self.faststart = faststart
+
+    @classmethod
+    def from_doc(cls, user_id, doc):
+        fields = {key: value for key, value in (doc or {}).items() if key in cls.__slots__ and key != "user_id"}
+        return cls(user_id, **fields)
+
+    def replace(self, **fields):
+        current = {key: getattr(self, key) for key in self.__slots__ if key != "user_id"}
+        current.update(fields)
+        return UserSettings(self.user_id, **current)
+
+
+class SettingsCache:
+    """TTL'd LRU of UserSettings; every change is written to MongoDB first."""
+
+    def __init__(self, ttl, size):
+        self.ttl = ttl
+        self.size = size
+        self._entries = OrderedDict()  # user_id -> (loaded_at, UserSettings)
+
+    def _put(self, prefs):
+        self._entries[prefs.user_id] = (time.monotonic(), prefs)
+        self._entries.move_to_end(prefs.user_id)
+        while len(self._entries) > self.size:
+            self._entries.popitem(last=False)
+
+    async def get(self, user_id):
+        entry = self._entries.get(user_id)
+        if entry and time.monotonic() - entry[0] < self.ttl:
+            self._entries.move_to_end(user_id)
+            return entry[1]
+        try:
+            doc = await settings_db.get_profile(user_id)
+        except Exception as e:
+            print(f"Error loading settings for {user_id}: {e}")
+            # A stale snapshot beats silently dropping the user's rules
+            return entry[1] if entry else UserSettings(user_id)
+        prefs = UserSettings.from_doc(user_id, doc)
+        self._put(prefs)
+        return prefs
+
+    async def update(self, user_id, **fields):
+        prefs = await self.get(user_id)
+        stored = {key: list(value) if isinstance(value, (set, frozenset)) else value for key, value in fields.items()}
+        try:
+            await settings_db.set_fields(user_id, stored)
+        except Exception as e:
+            print(f"Error saving settings for {user_id}: {e}")
+            self.invalidate(user_id)
+            return prefs
+        prefs = prefs.replace(**fields)
+        self._put(prefs)
+        return prefs
+
+    async def reset(self, user_id, keys):
+        try:
+            await settings_db.unset_fields(user_id, keys)
+        finally:
+            self.invalidate(user_id)
+
+    def invalidate(self, user_id):
+        self._entries.pop(user_id, None)
+
+
+user_settings = SettingsCache(SETTINGS_CACHE_TTL, SETTINGS_CACHE_SIZE)
@@ -0,0 +1,176 @@
+# ---------------------------------------------------
+# File Name: staging.py
+# Description: A Pyrogram bot for downloading files from Telegram channels or groups
+#              and uploading them back to Telegram.
+# Author: Gagan
+# GitHub: https://github.com/devgaganin/
+# Telegram: https://t.me/team_spy_pro
+# YouTube: https://youtube.com/@dev_gagan
+# Created: 2025-01-11
+# Last Modified: 2025-01-11
+# Version: 2.0.5
+# License: MIT License
+# Bookkeeping for bytes staged on disk between download and upload
+# ---------------------------------------------------
+
+import asyncio
+import shutil
+import time
+from collections import deque
+from config import STAGING_LIMIT_MB, MAX_TRANSFERS, DISK_RESERVE_MB, PREFETCH_HEADROOM_MB
+from devgagan.core.func import TimeFormatter, humanbytes
+
+STAGING_DIR = "."
+
+
+class ByteBudget:
+    """Caps the bytes held on disk by downloads that are waiting to be uploaded."""
+
+    def __init__(self, limit):
+        self.limit = limit
+        self.used = 0
+        self._cond = asyncio.Condition()
+
+    def _fits(self, size):
+        # A single file larger than the cap may still run once nothing else is staged
+        return self.used == 0 or self.used + size <= self.limit
+
+    async def reserve(self, size, may_overcommit=None):
+        """Wait until `size` bytes fit, or `may_overcommit()` says this item must not wait."""
+        size = max(int(size or 0), 0)
+        async with self._cond:
+            while not self._fits(size) and not (may_overcommit and may_overcommit()):
+                try:
+                    # Re-check periodically: the overcommit condition changes outside this lock
+                    await asyncio.wait_for(self._cond.wait(), timeout=1)
+                except asyncio.TimeoutError:
+                    pass
+            self.used += size
+        return size
+
+    async def release(self, size):
+        if not size:
+            return
+        async with self._cond:
+            self.used = max(self.used - size, 0)
+            self._cond.notify_all()
+
+
+class InsufficientSpace(Exception):
+    pass
+
+
+class Ticket:
+    def __init__(self, size):
+        self.size = size
+        self.admitted_at = None
+
+
+class AdmissionController:
+    """Admits transfers only while their expected bytes fit the free space on the staging volume.
+
+    Jobs that do not fit wait in FIFO order and are told their position and an
+    ETA derived from the throughput of recently finished transfers. A ticket
+    must only be held while bytes are being written; holding one while waiting
+    on another transfer can starve the queue.
+    """
+
+    def __init__(self, max_transfers, reserve, headroom, path=STAGING_DIR):
+        self.max_transfers = max_transfers
+        self.reserve = reserve
+        self.headroom = headroom
+        self.path = path
+        self.active = set()
+        self.reserved = 0
+        self._queue = deque()
+        self._recent = deque(maxlen=20)  # (bytes, seconds) of finished transfers
+        self._cond = asyncio.Condition()
+
+    def available(self):
+        # Conservative: bytes already written by active jobs are counted twice
+        return shutil.disk_usage(self.path).free - self.reserve - self.reserved
+
+    def _fits(self, size, extra=0):
+        return len(self.active) < self.max_transfers and size + extra <= self.available()
+
+    def _admit(self, ticket):
+        ticket.admitted_at = time.monotonic()
+        self.active.add(ticket)
+        self.reserved += ticket.size
+
+    def eta(self, position):
+        """Seconds until the job at `position` may start, or None without throughput samples."""
+        moved = sum(size for size, _ in self._recent)
+        spent = sum(seconds for _, seconds in self._recent)
+        if not moved or not spent:
+            return None
+        ahead = sum(ticket.size for ticket in list(self._queue)[:position]) + self.reserved
+        return ahead / (moved / spent * self.max_transfers)
+
+    async def try_admit(self, size):
+        """Admit right away if nobody is queued and PREFETCH_HEADROOM stays free, else None."""
+        size = max(int(size or 0), 0)
+        async with self._cond:
+            if self._queue or not self._fits(size, self.headroom):
+                return None
+            ticket = Ticket(size)
+            self._admit(ticket)
+            return ticket
+
+    async def acquire(self, size, notify=None):
+        """Wait in line until `size` bytes fit; `notify(position, eta)` reports queue progress."""
+        size = max(int(size or 0), 0)
+        ticket = Ticket(size)
+        last_position = None
+        async with self._cond:
+            self._queue.append(ticket)
+        try:
+            while True:
+                async with self._cond:
+                    if self._queue[0] is ticket and self._fits(size):
+                        self._queue.popleft()
+                        self._admit(ticket)
+                        self._cond.notify_all()
+                        return ticket
+                    if not self.active and self._queue[0] is ticket:
+                        raise InsufficientSpace(
+                            f"Not enough disk space: need {humanbytes(size)}, {humanbytes(max(self.available(), 0)) or '0 B'} free"
+                        )
+                    position = self._queue.index(ticket) + 1
+                if notify and position != last_position:
+                    last_position = position
+                    try:
+                        await notify(position, self.eta(position - 1))
+                    except Exception:
+                        pass
+                async with self._cond:
+                    try:
+                        # Free space also changes outside our bookkeeping, so re-check periodically
+                        await asyncio.wait_for(self._cond.wait(), timeout=5)
+                    except asyncio.TimeoutError:
+                        pass
+        finally:
+            if ticket.admitted_at is None and ticket in self._queue:
+                self._queue.remove(ticket)
+                async with self._cond:
+                    self._cond.notify_all()
+
+    async def release(self, ticket):
+        if ticket is None or ticket not in self.active:
+            return
+        async with self._cond:
+            self.active.discard(ticket)
+            self.reserved = max(self.reserved - ticket.size, 0)
+            seconds = time.monotonic() - ticket.admitted_at
+            if ticket.size and seconds > 0:
+                self._recent.append((ticket.size, seconds))
+            self._cond.notify_all()
+
+
+def queue_text(position, eta):
+    eta_text = TimeFormatter(milliseconds=eta * 1000) if eta else "unknown"
+    return f"⏳ Waiting for a free transfer slot...\n\nQueue position: {position}\nETA: {eta_text or '0s'}"
+
+
+staging = ByteBudget(STAGING_LIMIT_MB * 1024 * 1024)
+admission = AdmissionController(MAX_TRANSFERS, DISK_RESERVE_MB * 1024 * 1024, PREFETCH_HEADROOM_MB * 1024 * 1024)
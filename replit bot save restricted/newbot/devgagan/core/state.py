@@ -0,0 +1,183 @@
+# ---------------------------------------------------
+# File Name: state.py
+# Description: A Pyrogram bot for downloading files from Telegram channels or groups
+#              and uploading them back to Telegram.
+# Author: Gagan
+# GitHub: https://github.com/devgaganin/
+# Telegram: https://t.me/team_spy_pro
+# YouTube: https://youtube.com/@dev_gagan
+# Created: 2025-01-11
+# Last Modified: 2025-01-11
+# Version: 2.0.5
+# License: MIT License
+# Shared short-lived state: cooldowns, job locks, token params
+# ---------------------------------------------------
+
+import datetime
+import time
+from pymongo.errors import DuplicateKeyError
+from config import STATE_BACKEND, JOB_LOCK_TTL
+from devgagan.core.mongo import client
+
+
+class MemoryState:
+    """Process-local backend; every operation runs without awaiting, so it is atomic."""
+
+    def __init__(self, sweep_every=1000):
+        self._data = {}
+        self._writes = 0
+        self.sweep_every = sweep_every
+
+    async def setup(self):
+        pass
+
+    def _live(self, ns, key):
+        entry = self._data.get((ns, key))
+        if entry and entry[1] is not None and entry[1] <= time.monotonic():
+            del self._data[(ns, key)]
+            return None
+        return entry
+
+    def _put(self, ns, key, value, ttl):
+        self._data[(ns, key)] = (value, time.monotonic() + ttl if ttl else None)
+        self._writes += 1
+        if self._writes % self.sweep_every == 0:
+            now = time.monotonic()
+            for k in [k for k, (_, exp) in self._data.items() if exp is not None and exp <= now]:
+                del self._data[k]
+
+    async def get(self, ns, key):
+        entry = self._live(ns, key)
+        return entry[0] if entry else None
+
+    async def set(self, ns, key, value, ttl=None):
+        self._put(ns, key, value, ttl)
+
+    async def delete(self, ns, key):
+        self._data.pop((ns, key), None)
+
+    async def set_if_absent(self, ns, key, value, ttl=None):
+        if self._live(ns, key):
+            return False
+        self._put(ns, key, value, ttl)
+        return True
+
+    async def compare_and_set(self, ns, key, expected, value, ttl=None):
+        entry = self._live(ns, key)
+        if not entry or entry[0] != expected:
+            return False
+        self._put(ns, key, value, ttl)
+        return True
+
+    async def compare_and_delete(self, ns, key, expected):
+        entry = self._live(ns, key)
+        if not entry or entry[0] != expected:
+            return False
+        del self._data[(ns, key)]
+        return True
+
+
+class MongoState:
+    """Backend shared by every bot instance on the same database.
+
+    A TTL index reaps expired documents eventually; reads and conditional
+    writes also check `expires_at` so expiry is exact.
+    """
+
+    def __init__(self):
+        self.db = client.state.kv
+
+    async def setup(self):
+        await self.db.create_index("expires_at", expireAfterSeconds=0)
+
+    @staticmethod
+    def _id(ns, key):
+        return f"{ns}:{key}"
+
+    @staticmethod
+    def _expiry(ttl):
+        return datetime.datetime.utcnow() + datetime.timedelta(seconds=ttl) if ttl else None
+
+    @staticmethod
+    def _live_filter():
+        return {"$or": [{"expires_at": None}, {"expires_at": {"$gt": datetime.datetime.utcnow()}}]}
+
+    async def get(self, ns, key):
+        doc = await self.db.find_one({"_id": self._id(ns, key), **self._live_filter()})
+        return doc["value"] if doc else None
+
+    async def set(self, ns, key, value, ttl=None):
+        await self.db.update_one(
+            {"_id": self._id(ns, key)},
+            {"$set": {"value": value, "expires_at": self._expiry(ttl)}},
+            upsert=True
+        )
+
+    async def delete(self, ns, key):
+        await self.db.delete_one({"_id": self._id(ns, key)})
+
+    async def set_if_absent(self, ns, key, value, ttl=None):
+        # Matches only an expired document; a live one makes the upsert collide on _id
+        try:
+            await self.db.update_one(
+                {"_id": self._id(ns, key), "expires_at": {"$lte": datetime.datetime.utcnow()}},
+                {"$set": {"value": value, "expires_at": self._expiry(ttl)}},
+                upsert=True
+            )
+            return True
+        except DuplicateKeyError:
+            return False
+
+    async def compare_and_set(self, ns, key, expected, value, ttl=None):
+        result = await self.db.update_one(
+            {"_id": self._id(ns, key), "value": expected, **self._live_filter()},
+            {"$set": {"value": value, "expires_at": self._expiry(ttl)}}
+        )
+        return result.matched_count == 1
+
+    async def compare_and_delete(self, ns, key, expected):
+        result = await self.db.delete_one({"_id": self._id(ns, key), "value": expected, **self._live_filter()})
+        return result.deleted_count == 1
+
+
+class JobLocks:
+    """One running job (single link or batch) per user, cancellable from any instance."""
+
+    RUNNING = "running"
+    CANCELLED = "cancelled"
+
+    def __init__(self, backend, ttl):
+        self.backend = backend
+        self.ttl = ttl
+
+    async def acquire(self, user_id):
+        return await self.backend.set_if_absent("job", user_id, self.RUNNING, self.ttl)
+
+    async def claim(self, user_id):
+        """Take the lock unconditionally, for jobs resumed at boot."""
+        await self.backend.set("job", user_id, self.RUNNING, self.ttl)
+
+    async def refresh(self, user_id):
+        return await self.backend.compare_and_set("job", user_id, self.RUNNING, self.RUNNING, self.ttl)
+
+    async def status(self, user_id):
+        return await self.backend.get("job", user_id)
+
+    async def is_running(self, user_id):
+        return await self.status(user_id) == self.RUNNING
+
+    async def cancel(self, user_id):
+        return await self.backend.compare_and_set("job", user_id, self.RUNNING, self.CANCELLED, self.ttl)
+
+    async def release(self, user_id):
+        await self.backend.delete("job", user_id)
+
+
+def make_backend(name):
+    if name == "mongo":
+        return MongoState()
+    return MemoryState()
+
+
+state = make_backend(STATE_BACKEND)
+job_locks = JobLocks(state, JOB_LOCK_TTL)
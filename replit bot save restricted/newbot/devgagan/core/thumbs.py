@@ -0,0 +1,134 @@
+# ---------------------------------------------------
+# File Name: thumbs.py
+# Description: A Pyrogram bot for downloading files from Telegram channels or groups
+#              and uploading them back to Telegram.
+# Author: Gagan
+# GitHub: https://github.com/devgaganin/
+# Telegram: https://t.me/team_spy_pro
+# YouTube: https://youtube.com/@dev_gagan
+# Created: 2025-01-11
+# Last Modified: 2025-01-11
+# Version: 2.0.5
+# License: MIT License
+# Upload thumbnails: user thumb, then the source message's, then a keyframe grab
+# ---------------------------------------------------
+
+import asyncio
+import hashlib
+import os
+import tempfile
+from collections import OrderedDict
+from config import THUMB_CACHE_SIZE
+from devgagan.core.mediainfo import ffmpeg_slots
+
+THUMB_DIR = os.path.join(tempfile.gettempdir(), "devgagan_thumbs")
+GRAB_TIMEOUT = 60
+os.makedirs(THUMB_DIR, exist_ok=True)
+
+# cache key -> jpg path; the files belong to the cache, callers never delete them
+_cache = OrderedDict()
+
+
+def user_thumb(sender):
+    return f'{sender}.jpg' if os.path.exists(f'{sender}.jpg') else None
+
+
+def _cached(key):
+    path = _cache.get(key)
+    if path and os.path.exists(path):
+        _cache.move_to_end(key)
+        return path
+    _cache.pop(key, None)
+    return None
+
+
+def _remember(key, path):
+    _cache[key] = path
+    _cache.move_to_end(key)
+    while len(_cache) > THUMB_CACHE_SIZE:
+        _, old = _cache.popitem(last=False)
+        try:
+            os.remove(old)
+        except OSError:
+            pass
+    return path
+
+
+def _thumb_path(key):
+    return os.path.join(THUMB_DIR, hashlib.sha1(repr(key).encode()).hexdigest() + ".jpg")
+
+
+def _source_thumbs(msg):
+    media = msg.video or msg.document or msg.animation
+    return (media.thumbs or []) if media else []
+
+
+async def from_source(client, msg):
+    """The largest thumbnail Telegram already has for `msg`, downloaded once."""
+    thumbs = [t for t in _source_thumbs(msg) if getattr(t, "file_id", None)]
+    if not thumbs:
+        return None
+    best = max(thumbs, key=lambda t: (t.width or 0) * (t.height or 0))
+    key = ("source", best.file_unique_id)
+    path = _cached(key)
+    if path:
+        return path
+    path = await client.download_media(best.file_id, file_name=_thumb_path(key))
+    return _remember(key, path) if path and os.path.exists(path) else None
+
+
+async def from_keyframe(video, duration):
+    """Grab the keyframe nearest the middle of `video`, scaled to 320px wide."""
+    st = os.stat(video)
+    key = ("frame", os.path.abspath(video), st.st_size, st.st_mtime_ns)
+    path = _cached(key)
+    if path:
+        return path
+    path = _thumb_path(key)
+    # -ss before -i seeks on the demuxer, so only one GOP gets decoded
+    cmd = [
+        "ffmpeg", "-v", "error", "-ss", str(max(int(duration or 0) // 2, 0)),
+        "-skip_frame", "nokey", "-i", video,
+        "-frames:v", "1", "-vf", "scale=320:-2", "-q:v", "3", "-y", path
+    ]
+    async with ffmpeg_slots:
+        process = await asyncio.create_subprocess_exec(
+            *cmd,
+            stdout=asyncio.subprocess.DEVNULL,
+            stderr=asyncio.subprocess.PIPE
+        )
+        try:
+            _, stderr = await asyncio.wait_for(process.communicate(), GRAB_TIMEOUT)
+        except asyncio.TimeoutError:
+            process.kill()
+            await process.wait()
+            raise
+    if process.returncode != 0 or not os.path.isfile(path):
+        raise RuntimeError(stderr.decode(errors="ignore").strip() or "ffmpeg produced no frame")
+    return _remember(key, path)
+
+
+async def get_thumbnail(video, sender, duration, source=None, client=None):
+    """Best available thumbnail path for an upload, or None.
+
+    `source`/`client` are the original message and the session that can
+    download its media; without them the message thumb is skipped. With no
+    local `video` (relayed uploads) no frame is grabbed.
+    """
+    path = user_thumb(sender)
+    if path:
+        return path
+    if source is not None and client is not None:
+        try:
+            path = await from_source(client, source)
+            if path:
+                return path
+        except Exception as e:
+            print(f"Error fetching source thumbnail: {e}")
+    if video is None:
+        return None
+    try:
+        return await from_keyframe(video, duration)
+    except Exception as e:
+        print(f"Error generating thumbnail: {e}")
+        return None
@@ -0,0 +1,69 @@
+# ---------------------------------------------------
+# File Name: user_registry.py
+# Description: A Pyrogram bot for downloading files from Telegram channels or groups
+#              and uploading them back to Telegram.
+# Author: Gagan
+# GitHub: https://github.com/devgaganin/
+# Telegram: https://t.me/team_spy_pro
+# YouTube: https://youtube.com/@dev_gagan
+# Created: 2025-01-11
+# Last Modified: 2025-01-11
+# Version: 2.0.5
+# License: MIT License
+# Write-behind registration of users who message the bot
+# ---------------------------------------------------
+
+import asyncio
+from config import USER_FLUSH_INTERVAL, USER_FLUSH_BATCH, USER_SEEN_LIMIT
+from devgagan.core.mongo.users_db import add_users
+
+
+class UserRegistry:
+    """Collects user ids in memory and upserts new ones in batches.
+
+    `note()` costs a set lookup; ids not seen since boot are queued and written
+    by `run()` every `interval` seconds, or sooner once `batch` are waiting.
+    """
+
+    def __init__(self, interval, batch, seen_limit):
+        self.interval = interval
+        self.batch = batch
+        self.seen_limit = seen_limit
+        self._seen = set()
+        self._pending = set()
+        self._wake = asyncio.Event()
+        self._flush_lock = asyncio.Lock()
+
+    def note(self, user_id):
+        if user_id in self._seen:
+            return
+        if len(self._seen) >= self.seen_limit:
+            # Forgetting is safe: a re-queued id is just an idempotent upsert
+            self._seen.clear()
+        self._seen.add(user_id)
+        self._pending.add(user_id)
+        if len(self._pending) >= self.batch:
+            self._wake.set()
+
+    async def flush(self):
+        async with self._flush_lock:
+            if not self._pending:
+                return
+            batch, self._pending = self._pending, set()
+            try:
+                await add_users(batch)
+            except Exception as e:
+                print(f"User registration flush failed, will retry: {e}")
+                self._pending |= batch
+
+    async def run(self):
+        while True:
+            try:
+                await asyncio.wait_for(self._wake.wait(), timeout=self.interval)
+            except asyncio.TimeoutError:
+                pass
+            self._wake.clear()
+            await self.flush()
+
+
+user_registry = UserRegistry(USER_FLUSH_INTERVAL, USER_FLUSH_BATCH, USER_SEEN_LIMIT)
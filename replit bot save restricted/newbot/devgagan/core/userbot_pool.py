@@ -0,0 +1,114 @@
+# ---------------------------------------------------
+# File Name: userbot_pool.py
+# Description: A Pyrogram bot for downloading files from Telegram channels or groups
+#              and uploading them back to Telegram.
+# Author: Gagan
+# GitHub: https://github.com/devgaganin/
+# Telegram: https://t.me/team_spy_pro
+# YouTube: https://youtube.com/@dev_gagan
+# Created: 2025-01-11
+# Last Modified: 2025-01-11
+# Version: 2.0.5
+# License: MIT License
+# Warm, connected userbot clients shared across a user's requests
+# ---------------------------------------------------
+
+import asyncio
+import time
+from pyrogram import Client
+from config import API_ID, API_HASH, DOWNLOAD_CONNECTIONS, USERBOT_POOL_SIZE, USERBOT_IDLE_TTL
+
+
+class PooledUserbot:
+    def __init__(self, client, session_string):
+        self.client = client
+        self.session_string = session_string
+        self.refs = 0
+        self.last_used = time.monotonic()
+
+
+class UserbotPool:
+    """Keeps one started userbot per user, stopping idle ones after a TTL.
+
+    At most `max_sessions` clients stay alive; when the pool is full the least
+    recently used idle client is stopped, and if every client is busy the
+    caller waits for one to be released.
+    """
+
+    def __init__(self, max_sessions, idle_ttl):
+        self.max_sessions = max_sessions
+        self.idle_ttl = idle_ttl
+        self._entries = {}
+        self._user_locks = {}
+        self._cond = asyncio.Condition()
+
+    async def acquire(self, user_id, session_string):
+        lock = self._user_locks.setdefault(user_id, asyncio.Lock())
+        async with lock:
+            entry = self._entries.get(user_id)
+            if entry and (entry.session_string != session_string or not entry.client.is_connected):
+                # Session changed (re-login) or the connection died: rebuild
+                await self._drop(user_id, force=True)
+                entry = None
+            if entry is None:
+                await self._make_room()
+                client = Client(
+                    f"userbot_{user_id}",
+                    api_id=API_ID,
+                    api_hash=API_HASH,
+                    device_model='iPhone 16 Pro',
+                    session_string=session_string,
+                    max_concurrent_transmissions=DOWNLOAD_CONNECTIONS
+                )
+                await client.start()
+                entry = PooledUserbot(client, session_string)
+                self._entries[user_id] = entry
+            entry.refs += 1
+            entry.last_used = time.monotonic()
+            return entry.client
+
+    async def release(self, user_id):
+        entry = self._entries.get(user_id)
+        if entry and entry.refs > 0:
+            entry.refs -= 1
+            entry.last_used = time.monotonic()
+            async with self._cond:
+                self._cond.notify_all()
+
+    async def _make_room(self):
+        async with self._cond:
+            while len(self._entries) >= self.max_sessions:
+                idle = [(entry.last_used, uid) for uid, entry in self._entries.items() if entry.refs == 0]
+                if idle:
+                    await self._drop(min(idle)[1])
+                    continue
+                await self._cond.wait()
+
+    async def _drop(self, user_id, force=False):
+        entry = self._entries.get(user_id)
+        if entry is None or (entry.refs and not force):
+            return
+        self._entries.pop(user_id, None)
+        try:
+            await entry.client.stop()
+        except Exception as e:
+            print(f"Error stopping userbot for {user_id}: {e}")
+
+    async def reap_idle(self):
+        now = time.monotonic()
+        for user_id, entry in list(self._entries.items()):
+            if entry.refs == 0 and now - entry.last_used > self.idle_ttl:
+                await self._drop(user_id)
+        async with self._cond:
+            self._cond.notify_all()
+
+    async def run_reaper(self, interval=60):
+        while True:
+            await asyncio.sleep(interval)
+            try:
+                await self.reap_idle()
+            except Exception as e:
+                print(f"Userbot reaper error: {e}")
+
+
+userbot_pool = UserbotPool(USERBOT_POOL_SIZE, USERBOT_IDLE_TTL)
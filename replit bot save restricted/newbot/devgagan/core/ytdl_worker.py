@@ -0,0 +1,125 @@
+# ---------------------------------------------------
+# File Name: ytdl_worker.py
+# Description: A Pyrogram bot for downloading files from Telegram channels or groups
+#              and uploading them back to Telegram.
+# Author: Gagan
+# GitHub: https://github.com/devgaganin/
+# Telegram: https://t.me/team_spy_pro
+# YouTube: https://youtube.com/@dev_gagan
+# Created: 2025-01-11
+# Last Modified: 2025-01-11
+# Version: 2.0.5
+# License: MIT License
+# yt-dlp jobs in a child process, reporting progress as JSON lines on stdout
+# ---------------------------------------------------
+
+# Run by path, never imported inside the child: importing the devgagan package
+# would start the Telegram clients. The request is one JSON object on stdin:
+#   {"action": "extract" | "download" | "run", "opts": {...}, "url": ..., "info": {...}}
+# and every stdout line is {"event": "progress" | "result" | "error", ...}.
+
+import asyncio
+import json
+import os
+import sys
+import time
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+STREAM_LIMIT = 64 * 1024 * 1024  # a full info_dict with every format fits in one line
+PROGRESS_INTERVAL = 1
+PROGRESS_KEYS = (
+    "status", "downloaded_bytes", "total_bytes", "total_bytes_estimate", "speed", "eta",
+    "elapsed", "fragment_index", "fragment_count", "filename"
+)
+
+
+class YtdlError(Exception):
+    pass
+
+
+async def run_job(action, opts, url=None, info=None, on_progress=None):
+    """Run one yt-dlp job in a fresh interpreter and return its sanitized info_dict.
+
+    `on_progress` is awaited with each progress dict; a failing callback never
+    stops the download. Cancelling the caller kills the child.
+    """
+    process = await asyncio.create_subprocess_exec(
+        sys.executable, os.path.join(HERE, "ytdl_worker.py"),
+        stdin=asyncio.subprocess.PIPE,
+        stdout=asyncio.subprocess.PIPE,
+        limit=STREAM_LIMIT
+    )
+    result = None
+    error = None
+    try:
+        process.stdin.write(json.dumps({"action": action, "opts": opts, "url": url, "info": info}).encode())
+        await process.stdin.drain()
+        process.stdin.close()
+        async for line in process.stdout:
+            try:
+                message = json.loads(line)
+            except ValueError:
+                continue
+            event = message.get("event")
+            if event == "progress" and on_progress:
+                try:
+                    await on_progress(message["progress"])
+                except Exception as e:
+                    print(f"yt-dlp progress update failed: {e}")
+            elif event == "result":
+                result = message["info"]
+            elif event == "error":
+                error = message["message"]
+        await process.wait()
+    except BaseException:
+        if process.returncode is None:
+            process.kill()
+            await process.wait()
+        raise
+    if error or result is None:
+        raise YtdlError(error or f"yt-dlp worker exited with {process.returncode}")
+    return result
+
+
+def _emit(out, event, **payload):
+    out.write(json.dumps({"event": event, **payload}, default=str) + "\n")
+    out.flush()
+
+
+def _worker():
+    # Keep the protocol stream to ourselves; yt-dlp's own output goes to stderr
+    out = os.fdopen(os.dup(1), "w")
+    os.dup2(2, 1)
+    sys.stdout = sys.stderr
+    sys.path[:] = [p for p in sys.path if os.path.abspath(p or ".") != HERE]
+
+    request = json.load(sys.stdin)
+    last = 0
+
+    def hook(progress):
+        nonlocal last
+        now = time.monotonic()
+        if progress.get("status") == "downloading" and now - last < PROGRESS_INTERVAL:
+            return
+        last = now
+        _emit(out, "progress", progress={key: progress.get(key) for key in PROGRESS_KEYS})
+
+    opts = dict(request.get("opts") or {})
+    opts["progress_hooks"] = [hook]
+    try:
+        import yt_dlp
+        with yt_dlp.YoutubeDL(opts) as ydl:
+            if request["action"] == "extract":
+                info = ydl.extract_info(request["url"], download=False)
+            elif request["action"] == "download":
+                info = ydl.process_ie_result(request["info"], download=True)
+            else:
+                info = ydl.extract_info(request["url"], download=True)
+            _emit(out, "result", info=ydl.sanitize_info(info))
+    except Exception as e:
+        _emit(out, "error", message=str(e))
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    _worker()
@@ -17,14 +17,17 @@ import time
 import random
 import string
 import asyncio
-from pyrogram import filters, Client
+from pyrogram import filters
 from devgagan import app, userrbot
-from config import API_ID, API_HASH, FREEMIUM_LIMIT, PREMIUM_LIMIT, OWNER_ID, DEFAULT_SESSION
+from config import FREEMIUM_LIMIT, PREMIUM_LIMIT, OWNER_ID, DEFAULT_SESSION, BATCH_WORKERS, PREFETCH_DEPTH, RESUME_BATCH_JOBS
 from devgagan.core.get_func import get_msg
 from devgagan.core.func import *
-from devgagan.core.mongo import db
+from devgagan.core.batch import run_ordered_pool
+from devgagan.core.userbot_pool import userbot_pool
+from devgagan.core.mongo import jobs_db
+from devgagan.core.state import state, job_locks
+from devgagan.core.settings import user_settings
 from pyrogram.errors import FloodWait
-from datetime import datetime, timedelta
 from pyrogram.types import InlineKeyboardButton, InlineKeyboardMarkup
 import subprocess
 from devgagan.modules.shrink import is_user_verified
@@ -33,43 +36,31 @@ async def generate_random_name(length=8):
 
 
 
-users_loop = {}
-interval_set = {}
-batch_mode = {}
-
-async def process_and_upload_link(userbot, user_id, msg_id, link, retry_count, message):
+async def process_and_upload_link(userbot, user_id, msg_id, link, retry_count, message, turn=None):
     try:
-        await get_msg(userbot, user_id, msg_id, link, retry_count, message)
+        await get_msg(userbot, user_id, msg_id, link, retry_count, message, turn)
+    finally:
         try:
             await app.delete_messages(user_id, msg_id)
         except Exception:
             pass
-        await asyncio.sleep(15)
-    finally:
-        pass
 
 # Function to check if the user can proceed
 async def check_interval(user_id, freecheck):
     if freecheck != 1 or await is_user_verified(user_id):  # Premium or owner users can always proceed
         return True, None
 
-    now = datetime.now()
-
-    # Check if the user is on cooldown
-    if user_id in interval_set:
-        cooldown_end = interval_set[user_id]
-        if now < cooldown_end:
-            remaining_time = (cooldown_end - now).seconds
-            return False, f"Please wait {remaining_time} seconds(s) before sending another link. Alternatively, purchase premium for instant access.\n\n> Hey 👋 You can use /token to use the bot free for 3 hours without any time limit."
-        else:
-            del interval_set[user_id]  # Cooldown expired, remove user from interval set
+    # Check if the user is on cooldown; the entry expires with the cooldown
+    cooldown_end = await state.get("cooldown", user_id)
+    if cooldown_end and time.time() < cooldown_end:
+        remaining_time = int(cooldown_end - time.time())
+        return False, f"Please wait {remaining_time} seconds(s) before sending another link. Alternatively, purchase premium for instant access.\n\n> Hey 👋 You can use /token to use the bot free for 3 hours without any time limit."
 
     return True, None
 
 async def set_interval(user_id, interval_minutes=45):
-    now = datetime.now()
     # Set the cooldown interval for the user
-    interval_set[user_id] = now + timedelta(seconds=interval_minutes)
+    await state.set("cooldown", user_id, time.time() + interval_minutes, ttl=interval_minutes)
     
 
 @app.on_message(
@@ -79,15 +70,8 @@ async def set_interval(user_id, interval_minutes=45):
 async def single_link(_, message):
     user_id = message.chat.id
 
-    # Check subscription and batch mode
-    if await subscribe(_, message) == 1 or user_id in batch_mode:
-        return
-
-    # Check if user is already in a loop
-    if users_loop.get(user_id, False):
-        await message.reply(
-            "You already have an ongoing process. Please wait for it to finish or cancel it with /cancel."
-        )
+    # Check subscription
+    if await subscribe(_, message) == 1:
         return
 
     # Check freemium limits
@@ -101,45 +85,46 @@ async def single_link(_, message):
         await message.reply(response_message)
         return
 
-    # Add user to the loop
-    users_loop[user_id] = True
+    # Take the user's job lock; fails if another link or batch is still running
+    if not await job_locks.acquire(user_id):
+        await message.reply(
+            "You already have an ongoing process. Please wait for it to finish or cancel it with /cancel."
+        )
+        return
 
-    link = message.text if "tg://openmessage" in message.text else get_link(message.text)
-    msg = await message.reply("Processing...")
-    userbot = await initialize_userbot(user_id)
+    # Everything after the lock is taken runs under this finally, so a failing
+    # reply or userbot start cannot leave the user locked out until the TTL
     try:
-        if await is_normal_tg_link(link):
-            await process_and_upload_link(userbot, user_id, msg.id, link, 0, message)
-            await set_interval(user_id, interval_minutes=45)
-        else:
-            await process_special_links(userbot, user_id, msg, link)
-            
-    except FloodWait as fw:
-        await msg.edit_text(f'Try again after {fw.x} seconds due to floodwait from Telegram.')
-    except Exception as e:
-        await msg.edit_text(f"Link: `{link}`\n\n**Error:** {str(e)}")
-    finally:
-        users_loop[user_id] = False
+        link = message.text if "tg://openmessage" in message.text else get_link(message.text)
+        msg = await message.reply("Processing...")
+        userbot = await initialize_userbot(user_id)
         try:
-            await msg.delete()
-        except Exception:
-            pass
+            if await is_normal_tg_link(link):
+                await process_and_upload_link(userbot, user_id, msg.id, link, 0, message)
+                await set_interval(user_id, interval_minutes=45)
+            else:
+                await process_special_links(userbot, user_id, msg, link)
+                
+        except FloodWait as fw:
+            await msg.edit_text(f'Try again after {fw.x} seconds due to floodwait from Telegram.')
+        except Exception as e:
+            await msg.edit_text(f"Link: `{link}`\n\n**Error:** {str(e)}")
+        finally:
+            await userbot_pool.release(user_id)
+            try:
+                await msg.delete()
+            except Exception:
+                pass
+    finally:
+        await job_locks.release(user_id)
 
 
 async def initialize_userbot(user_id): # this ensure the single startup .. even if logged in or not
-    data = await db.get_data(user_id)
-    if data and data.get("session"):
+    prefs = await user_settings.get(user_id)
+    if prefs.session:
         try:
-            device = 'iPhone 16 Pro' # added gareebi text
-            userbot = Client(
-                "userbot",
-                api_id=API_ID,
-                api_hash=API_HASH,
-                device_model=device,
-                session_string=data.get("session")
-            )
-            await userbot.start()
-            return userbot
+            # Warm client from the pool; callers hand it back with userbot_pool.release
+            return await userbot_pool.acquire(user_id, prefs.session)
         except Exception:
             await app.send_message(user_id, "Login Expired re do login")
             return None
@@ -177,7 +162,7 @@ async def batch_link(_, message):
         return
     user_id = message.chat.id
     # Check if a batch process is already running
-    if users_loop.get(user_id, False):
+    if await job_locks.status(user_id):
         await app.send_message(
             message.chat.id,
             "You already have a batch process running. Please wait for it to complete."
@@ -227,83 +212,157 @@ async def batch_link(_, message):
         await message.reply(response_message)
         return
         
-    join_button = InlineKeyboardButton("Join Channel", url="https://t.me/KINGSTONJK7")
-    keyboard = InlineKeyboardMarkup([[join_button]])
     pin_msg = await app.send_message(
         user_id,
         f"Batch process started ⚡\nProcessing: 0/{cl}\n\n**Powered by KINGSTON**",
-        reply_markup=keyboard
+        reply_markup=BATCH_KEYBOARD
     )
     await pin_msg.pin(both_sides=True)
 
-    users_loop[user_id] = True
+    if not await job_locks.acquire(user_id):
+        await pin_msg.edit_text("You already have a process running. Please wait for it to complete.")
+        return
+    base_link = '/'.join(start_id.split('/')[:-1])
+    try:
+        job = await jobs_db.create_job(user_id, base_link, cs, cl, pin_msg.id)
+    except Exception:
+        await job_locks.release(user_id)
+        raise
+    await run_batch_job(job, message)
+
+
+BATCH_KEYBOARD = InlineKeyboardMarkup([[InlineKeyboardButton("Join Channel", url="https://t.me/KINGSTONJK7")]])
+
+
+def build_batch_links(base_link, start_id, count, logged_in):
+    """Links of a batch job, or None if it needs a login the user does not have."""
+    links = [get_link(f"{base_link}/{i}") for i in range(start_id, start_id + count)]
+    # Normal t.me links work without userbot, private ones need a login
+    normal_links = [link for link in links if link and 't.me/' in link and not any(x in link for x in ['t.me/b/', 't.me/c/', 'tg://openmessage'])]
+    if normal_links:
+        return normal_links
+    if not logged_in:
+        return None
+    return [link for link in links if link and any(x in link for x in ['t.me/b/', 't.me/c/'])]
+
+
+async def run_batch_job(job, message=None):
+    """Deliver a batch job from its last checkpoint; the caller holds the user's job lock."""
+    user_id = job["user_id"]
+    cl = job["count"]
+    done = job.get("delivered", 0)
+    status, error = "cancelled", None
+
     try:
-        normal_links_handled = False
         userbot = await initialize_userbot(user_id)
-        # Handle normal links first
-        for i in range(cs, cs + cl):
-            if user_id in users_loop and users_loop[user_id]:
-                url = f"{'/'.join(start_id.split('/')[:-1])}/{i}"
-                link = get_link(url)
-                # Process t.me links (normal) without userbot
-                if 't.me/' in link and not any(x in link for x in ['t.me/b/', 't.me/c/', 'tg://openmessage']):
-                    msg = await app.send_message(message.chat.id, f"Processing...")
-                    await process_and_upload_link(userbot, user_id, msg.id, link, 0, message)
-                    await pin_msg.edit_text(
-                        f"Batch process started ⚡\nProcessing: {i - cs + 1}/{cl}\n\n**__Powered by KINGSTON__**",
-                        reply_markup=keyboard
-                    )
-                    normal_links_handled = True
-        if normal_links_handled:
-            await set_interval(user_id, interval_minutes=300)
-            await pin_msg.edit_text(
-                f"Batch completed successfully for {cl} messages 🎉\n\n**__Powered by KINGSTON__**",
-                reply_markup=keyboard
+        links = build_batch_links(job["base_link"], job["start_id"], cl, userbot is not None)
+        if links is None:
+            status, error = "failed", "not logged in"
+            await app.send_message(user_id, "Login in bot first ...")
+            return
+
+        async def handle_link(link, turn):
+            msg = await app.send_message(user_id, "Processing...")
+            await process_and_upload_link(userbot, user_id, msg.id, link, 0, message, turn)
+
+        async def report_skip(seq, link, reason):
+            await app.send_message(user_id, f"⚠️ Skipped {link}\n\nReason: {reason}")
+
+        async def update_pin(seq, link):
+            await jobs_db.checkpoint(job["_id"], done + seq + 1)
+            await job_locks.refresh(user_id)
+            await app.edit_message_text(
+                user_id, job["pin_msg_id"],
+                f"Batch process started ⚡\nProcessing: {done + seq + 1}/{cl}\n\n**__Powered by KINGSTON__**",
+                reply_markup=BATCH_KEYBOARD
             )
-            await app.send_message(message.chat.id, "Batch completed successfully! 🎉")
+
+        await run_ordered_pool(
+            links[done:],
+            handle_link,
+            BATCH_WORKERS,
+            is_active=lambda: job_locks.is_running(user_id),
+            on_delivered=update_pin,
+            on_skipped=report_skip,
+            depth=PREFETCH_DEPTH
+        )
+        if not await job_locks.is_running(user_id):
             return
-            
-        # Handle special links with userbot
-        for i in range(cs, cs + cl):
-            if not userbot:
-                await app.send_message(message.chat.id, "Login in bot first ...")
-                users_loop[user_id] = False
-                return
-            if user_id in users_loop and users_loop[user_id]:
-                url = f"{'/'.join(start_id.split('/')[:-1])}/{i}"
-                link = get_link(url)
-                if any(x in link for x in ['t.me/b/', 't.me/c/']):
-                    msg = await app.send_message(message.chat.id, f"Processing...")
-                    await process_and_upload_link(userbot, user_id, msg.id, link, 0, message)
-                    await pin_msg.edit_text(
-                        f"Batch process started ⚡\nProcessing: {i - cs + 1}/{cl}\n\n**__Powered by KINGSTON__**",
-                        reply_markup=keyboard
-                    )
 
+        status = "done"
         await set_interval(user_id, interval_minutes=300)
-        await pin_msg.edit_text(
+        await app.edit_message_text(
+            user_id, job["pin_msg_id"],
             f"Batch completed successfully for {cl} messages 🎉\n\n**__Powered by KINGSTON__**",
-            reply_markup=keyboard
+            reply_markup=BATCH_KEYBOARD
         )
-        await app.send_message(message.chat.id, "Batch completed successfully! 🎉")
+        await app.send_message(user_id, "Batch completed successfully! 🎉")
 
+    except asyncio.CancelledError:
+        # Shutting down: leave the job running so the next boot resumes it
+        status = None
+        raise
     except Exception as e:
-        await app.send_message(message.chat.id, f"Error: {e}")
+        status, error = "failed", str(e)
+        await app.send_message(user_id, f"Error: {e}")
     finally:
-        users_loop.pop(user_id, None)
+        await job_locks.release(user_id)
+        await userbot_pool.release(user_id)
+        if status:
+            await jobs_db.finish(job["_id"], status, error)
+
+
+async def resume_batch_jobs():
+    """Pick up batches that were still running when the bot went down."""
+    if not RESUME_BATCH_JOBS:
+        return
+    for job in await jobs_db.get_running_jobs():
+        # The process that held this lock is gone; take it over
+        await job_locks.claim(job["user_id"])
+        try:
+            await app.send_message(
+                job["user_id"],
+                f"♻️ Bot restarted, resuming your batch from {job.get('delivered', 0)}/{job['count']}."
+            )
+        except Exception as e:
+            print(f"Could not notify {job['user_id']} about resumed batch: {e}")
+        asyncio.create_task(run_batch_job(job))
+
+
+@app.on_message(filters.command("jobs") & filters.private)
+async def list_jobs(_, message):
+    user_id = message.chat.id
+    if len(message.command) > 1 and message.command[1] == "all" and user_id in OWNER_ID:
+        jobs = await jobs_db.get_running_jobs()
+        title = "**Running batch jobs**"
+    else:
+        jobs = await jobs_db.get_user_jobs(user_id)
+        title = "**Your recent batch jobs**"
+    if not jobs:
+        return await message.reply("No batch jobs found.")
+    lines = []
+    for job in jobs:
+        first = job["start_id"]
+        last = job["start_id"] + job["count"] - 1
+        lines.append(
+            f"`{str(job['_id'])[-6:]}` {job['base_link']}/{first}-{last}\n"
+            f"> {job['status']} · {job.get('delivered', 0)}/{job['count']} done"
+            + (f" · user `{job['user_id']}`" if user_id in OWNER_ID else "")
+            + (f"\n> {job['error']}" if job.get("error") else "")
+        )
+    await message.reply(title + "\n\n" + "\n\n".join(lines))
 
 @app.on_message(filters.command("cancel"))
 async def stop_batch(_, message):
     user_id = message.chat.id
 
     # Check if there is an active batch process for the user
-    if user_id in users_loop and users_loop[user_id]:
-        users_loop[user_id] = False  # Set the loop status to False
+    if await job_locks.cancel(user_id):
         await app.send_message(
             message.chat.id, 
             "Batch processing has been stopped successfully. You can start a new batch now if you want."
         )
-    elif user_id in users_loop and not users_loop[user_id]:
+    elif await job_locks.status(user_id) == job_locks.CANCELLED:
         await app.send_message(
             message.chat.id, 
             "The batch process was already stopped. No active batch to cancel."
@@ -17,6 +17,7 @@ from devgagan import app
 from config import OWNER_ID
 from devgagan.core.func import get_seconds
 from devgagan.core.mongo import plans_db  
+from devgagan.core.notifier import notifier
 from pyrogram import filters 
 
 # Constants
@@ -180,50 +181,35 @@ async def transfer_premium(client, message):
     else:
         await message.reply_text("⚠️ Usage: /transfer user_id")
 
-async def premium_remover():
-    all_users = await plans_db.premium_users()
-    removed_users = []
-    not_removed_users = []
-
-    for user_id in all_users:
-        try:
-            user = await app.get_users(user_id)
-            chk_time = await plans_db.check_premium(user_id)
-
-            if chk_time and chk_time.get("expire_date"):
-                expiry_date = chk_time["expire_date"]
+EXPIRED_TEXT = "Hello, your premium subscription has expired."
 
-                if expiry_date <= datetime.datetime.now():
-                    name = user.first_name
-                    await plans_db.remove_premium(user_id)
-                    await app.send_message(
-                        user_id, 
-                        text=f"Hello {name}, your premium subscription has expired."
-                    )
-                    removed_users.append(f"{name} ({user_id})")
-                else:
-                    name = user.first_name
-                    current_time = datetime.datetime.now()
-                    time_left = expiry_date - current_time
+async def expire_premium_plans():
+    """Drop expired plans and queue a notice to each affected user."""
+    removed = await plans_db.check_and_remove_expired_users()
+    for user_id in removed:
+        notifier.send(user_id, EXPIRED_TEXT)
+    return removed
 
-                    days = time_left.days
-                    hours, remainder = divmod(time_left.seconds, 3600)
-                    minutes, seconds = divmod(remainder, 60)
-
-                    if days > 0:
-                        remaining_time = f"{days} days, {hours} hours, {minutes} minutes"
-                    elif hours > 0:
-                        remaining_time = f"{hours} hours, {minutes} minutes"
-                    elif minutes > 0:
-                        remaining_time = f"{minutes} minutes"
-                    else:
-                        remaining_time = f"{seconds} seconds"
+async def resolve_names(user_ids, chunk=200):
+    """First names for `user_ids`, looked up in batches rather than one call each."""
+    names = {}
+    for i in range(0, len(user_ids), chunk):
+        try:
+            users = await app.get_users(user_ids[i:i + chunk])
+        except Exception as e:
+            print(f"Failed to resolve users: {e}")
+            continue
+        for user in users if isinstance(users, list) else [users]:
+            names[user.id] = user.first_name
+    return names
 
-                    not_removed_users.append(f"{name} ({user_id})")
-        except:
-            await plans_db.remove_premium(user_id)
-            removed_users.append(f"Unknown ({user_id})")
+async def premium_remover():
+    removed = await expire_premium_plans()
+    active = await plans_db.premium_users()
+    names = await resolve_names(removed + active)
 
+    removed_users = [f"{names.get(user_id, 'Unknown')} ({user_id})" for user_id in removed]
+    not_removed_users = [f"{names.get(user_id, 'Unknown')} ({user_id})" for user_id in active]
     return removed_users, not_removed_users
 
 @app.on_message(filters.command("freez") & filters.user(OWNER_ID))
@@ -22,11 +22,11 @@ import aiohttp
 from devgagan import app
 from devgagan.core.func import *
 from datetime import datetime, timedelta
-from motor.motor_asyncio import AsyncIOMotorClient
-from config import MONGO_DB, WEBSITE_URL, AD_API, LOG_GROUP  
+from devgagan.core.mongo import client as tclient
+from devgagan.core.state import state
+from config import WEBSITE_URL, AD_API, LOG_GROUP  
  
  
-tclient = AsyncIOMotorClient(MONGO_DB)
 tdb = tclient["telegram_bot"]
 token = tdb["tokens"]
  
@@ -36,7 +36,8 @@ async def create_ttl_index():
  
  
  
-Param = {}
+# Pending verification params live in the shared state backend for a day
+PARAM_TTL = 24 * 3600
  
  
 async def generate_random_param(length=8):
@@ -100,15 +101,14 @@ async def token_handler(client, message):
  
      
     if param:
-        if user_id in Param and Param[user_id] == param:
-             
+        # Consumed atomically, so one link verifies once even across instances
+        if await state.compare_and_delete("token_param", user_id, param):
             await token.insert_one({
                 "user_id": user_id,
                 "param": param,
                 "created_at": datetime.utcnow(),
                 "expires_at": datetime.utcnow() + timedelta(hours=3),
             })
-            del Param[user_id]   
             await message.reply("✅ You have been verified successfully! Enjoy your session for next 3 hours.")
             return
         else:
@@ -128,7 +128,7 @@ async def smart_handler(client, message):
     else:
          
         param = await generate_random_param()
-        Param[user_id] = param   
+        await state.set("token_param", user_id, param, ttl=PARAM_TTL)
  
          
         deep_link = f"https://t.me/{client.me.username}?start={param}"
@@ -52,8 +52,10 @@ async def set(_, message):
         BotCommand("terms", "🥺 Terms and conditions"),
         BotCommand("speedtest", "🚅 Speed of server"),
         BotCommand("lock", "🔒 Protect channel from extraction"),
+        BotCommand("unlock", "🔓 Lift a channel lock"),
         BotCommand("gcast", "⚡ Broadcast message to bot users"),
         BotCommand("help", "❓ If you're a noob, still!"),
+        BotCommand("jobs", "📋 Show your batch jobs"),
         BotCommand("cancel", "🚫 Cancel batch process")
     ])
  
@@ -74,7 +76,7 @@ help_pages = [
         "4. **/get**\n"
         "> Get all user IDs (Owner only)\n\n"
         "5. **/lock**\n"
-        "> Lock channel from extraction (Owner only)\n\n"
+        "> Lock channel from extraction, /unlock to lift it (Owner only)\n\n"
         "6. **/dl link**\n"
         "> Download videos (Not available in v3 if you are using)\n\n"
         "7. **/adl link**\n"
@@ -97,7 +99,7 @@ help_pages = [
         "14. **/terms**\n"
         "> Terms and conditions\n\n"
         "15. **/cancel**\n"
-        "> Cancel ongoing batch process\n\n"
+        "> Cancel ongoing batch process, /jobs shows your batches\n\n"
         "16. **/myplan**\n"
         "> Get details about your plans\n\n"
         "17. **/session**\n"
@@ -20,8 +20,10 @@ import motor
 from devgagan import app
 from pyrogram import filters
 from config import OWNER_ID
-from devgagan.core.mongo.users_db import get_users, add_user, get_user
-from devgagan.core.mongo.plans_db import premium_users
+from devgagan.core.mongo.users_db import count_users
+from devgagan.core.user_registry import user_registry
+from devgagan.core.premium import entitlements
+from devgagan.core.mongo.metrics import command_metrics
 
 
 
@@ -29,13 +31,8 @@ start_time = time.time()
 
 @app.on_message(group=10)
 async def chat_watcher_func(_, message):
-    try:
-        if message.from_user:
-            us_in_db = await get_user(message.from_user.id)
-            if not us_in_db:
-                await add_user(message.from_user.id)
-    except:
-        pass
+    if message.from_user:
+        user_registry.note(message.from_user.id)
 
 
 
@@ -63,8 +60,7 @@ def time_formatter():
 @app.on_message(filters.command("stats") & filters.user(OWNER_ID))
 async def stats(client, message):
     start = time.time()
-    users = len(await get_users())
-    premium = await premium_users()
+    users = await count_users()
     ping = round((time.time() - start) * 1000)
     await message.reply_text(f"""
 **Stats of** {(await client.get_me()).mention} :
@@ -72,10 +68,29 @@ async def stats(client, message):
 🏓 **Ping Pong**: {ping}ms
 
 📊 **Total Users** : `{users}`
-📈 **Premium Users** : `{len(premium)}`
+📈 **Premium Users** : `{len(entitlements)}`
 ⚙️ **Bot Uptime** : `{time_formatter()}`
     
 🎨 **Python Version**: `{sys.version.split()[0]}`
 📑 **Mongo Version**: `{motor.version}`
 """)
   
+
+
+@app.on_message(filters.command("dbstats") & filters.user(OWNER_ID))
+async def db_stats(client, message):
+    if len(message.command) > 1 and message.command[1] == "reset":
+        command_metrics.reset()
+        return await message.reply_text("DB metrics reset.")
+    rows = command_metrics.snapshot()[:15]
+    if not rows:
+        return await message.reply_text("No DB operations recorded yet.")
+    lines = []
+    for (namespace, command), op in rows:
+        lines.append(
+            f"`{namespace}` **{command}**\n"
+            f"> calls {op.count} | err {op.errors} | total {op.total_ms:.0f}ms\n"
+            f"> avg {op.total_ms / op.count:.1f}ms | p50 ≤{op.percentile(50):.0f}ms | "
+            f"p95 ≤{op.percentile(95):.0f}ms | max {op.max_ms:.0f}ms"
+        )
+    await message.reply_text("**DB time by call site**\n\n" + "\n\n".join(lines))
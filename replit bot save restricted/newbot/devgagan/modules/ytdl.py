@@ -13,7 +13,6 @@
 # ---------------------------------------------------
 
 
-import yt_dlp
 import os
 import tempfile
 import time
@@ -22,28 +21,68 @@ import random
 import string
 import requests
 import logging
-import cv2
+import shutil
 from devgagan import sex as client
 from pyrogram import Client,filters
 from telethon import events
 from telethon.sync import TelegramClient
 from telethon.tl.types import DocumentAttributeVideo
-from devgagan.core.func import screenshot, video_metadata, progress_bar
+from devgagan.core.func import video_metadata, humanbytes, TimeFormatter
+from devgagan.core.thumbs import get_thumbnail
+from devgagan.core.ytdl_worker import run_job
+from devgagan.core.filerange import upload_file_parts
+from devgagan.core.staging import admission, queue_text, InsufficientSpace
 from telethon.tl.functions.messages import EditMessageRequest
 from devgagantools import fast_upload
-from concurrent.futures import ThreadPoolExecutor
 import aiohttp 
 from devgagan import app
 import logging
-import aiofiles
 from mutagen.id3 import ID3, TIT2, TPE1, COMM, APIC
 from mutagen.mp3 import MP3
+from config import (
+    YTDL_MAX_JOBS, YTDL_FRAGMENTS, YTDL_CHUNK_MB, YTDL_CONNECTIONS,
+    YTDL_JOB_RATE_KB, YTDL_TOTAL_RATE_KB, YTDL_ARIA2C, LOG_GROUP
+)
  
 logger = logging.getLogger(__name__)
  
  
-thread_pool = ThreadPoolExecutor()
 ongoing_downloads = {}
+ytdl_slots = asyncio.Semaphore(YTDL_MAX_JOBS)
+ 
+ 
+def job_rate_limit():
+    """Bytes/s one job may use: its own cap, or an equal share of the global one."""
+    limits = [kb * 1024 for kb in (YTDL_JOB_RATE_KB, YTDL_TOTAL_RATE_KB // max(YTDL_MAX_JOBS, 1)) if kb > 0]
+    return min(limits) if limits else None
+ 
+ 
+def downloader_profile():
+    """yt-dlp options shared by /dl and /adl for parallel, chunked downloads."""
+    opts = {
+        'concurrent_fragment_downloads': max(YTDL_FRAGMENTS, 1),
+        'http_chunk_size': YTDL_CHUNK_MB * 1024 * 1024 if YTDL_CHUNK_MB > 0 else None,
+        'ratelimit': job_rate_limit(),
+    }
+    if YTDL_ARIA2C and shutil.which("aria2c"):
+        # Only plain HTTP(S) goes to aria2c; HLS/DASH stay native to use the fragment workers
+        connections = str(max(YTDL_CONNECTIONS, 1))
+        args = ['-x', connections, '-s', connections, '-k', '1M', '--console-log-level=warn']
+        if opts['ratelimit']:
+            args.append(f"--max-overall-download-limit={opts['ratelimit']}")
+        opts['external_downloader'] = {'http': 'aria2c'}
+        opts['external_downloader_args'] = {'aria2c': args}
+    return {key: value for key, value in opts.items() if value is not None}
+ 
+ 
+DOWNLOADER_PROFILE = downloader_profile()
+ 
+ 
+async def ytdl_turn(progress_message):
+    """Wait for a free yt-dlp slot, telling the user when they are queued."""
+    if ytdl_slots.locked():
+        await progress_message.edit("**__Waiting for a free download slot...__**")
+    await ytdl_slots.acquire()
  
 def d_thumbnail(thumbnail_url, save_path):
     try:
@@ -66,11 +105,31 @@ async def download_thumbnail_async(url, path):
                     f.write(await response.read())
  
  
-async def extract_audio_async(ydl_opts, url):
-    def sync_extract():
-        with yt_dlp.YoutubeDL(ydl_opts) as ydl:
-            return ydl.extract_info(url, download=True)
-    return await asyncio.get_event_loop().run_in_executor(thread_pool, sync_extract)
+def download_progress(progress_message, interval=5):
+    """Progress callback for run_job that edits `progress_message` every `interval` seconds."""
+    last = 0
+
+    async def report(progress):
+        nonlocal last
+        if progress.get("status") != "downloading" or time.time() - last < interval:
+            return
+        last = time.time()
+        done = progress.get("downloaded_bytes") or 0
+        total = progress.get("total_bytes") or progress.get("total_bytes_estimate") or 0
+        percent = f"{done * 100 / total:.1f}%" if total else "?"
+        eta = TimeFormatter(milliseconds=(progress.get("eta") or 0) * 1000) or "0 s"
+        await progress_message.edit(
+            f"**__Downloading...__** {percent}\n\n"
+            f"**__Done:__** {humanbytes(done)} / {humanbytes(total) or '?'}\n"
+            f"**__Speed:__** {humanbytes(progress.get('speed') or 0) or '0 B'}/s\n"
+            f"**__ETA:__** {eta}"
+        )
+    return report
+
+
+async def extract_audio_async(ydl_opts, url, on_progress=None):
+    # One pass: extraction and download share the same yt-dlp run
+    return await run_job("run", ydl_opts, url=url, on_progress=on_progress)
  
  
 def get_random_string(length=7):
@@ -100,6 +159,7 @@ async def process_audio(client, event, url, cookies_env_var=None):
         'postprocessors': [{'key': 'FFmpegExtractAudio', 'preferredcodec': 'mp3', 'preferredquality': '192'}],
         'quiet': False,
         'noplaylist': True,
+        **DOWNLOADER_PROFILE,
     }
     prog = None
  
@@ -107,7 +167,11 @@ async def process_audio(client, event, url, cookies_env_var=None):
  
     try:
          
-        info_dict = await extract_audio_async(ydl_opts, url)
+        await ytdl_turn(progress_message)
+        try:
+            info_dict = await extract_audio_async(ydl_opts, url, download_progress(progress_message))
+        finally:
+            ytdl_slots.release()
         title = info_dict.get('title', 'Extracted Audio')
  
         await progress_message.edit("**__Editing metadata...__**")
@@ -192,28 +256,33 @@ async def handler(event):
         ongoing_downloads.pop(user_id, None)
  
  
+async def extract_info(url, ydl_opts):
+    """Resolve `url` once (page, player JS, signatures); the result feeds download_info."""
+    return await run_job("extract", ydl_opts, url=url)
+
+
+async def download_info(info_dict, ydl_opts, on_progress=None):
+    """Download the formats already selected in `info_dict` without extracting again."""
+    return await run_job("download", ydl_opts, info=info_dict, on_progress=on_progress)
+
+
 async def fetch_video_info(url, ydl_opts, progress_message, check_duration_and_size):
-    with yt_dlp.YoutubeDL(ydl_opts) as ydl:
-        info_dict = ydl.extract_info(url, download=False)
+    info_dict = await extract_info(url, ydl_opts)
  
-        if check_duration_and_size:
-             
-            duration = info_dict.get('duration', 0)
-            if duration and duration > 3 * 3600:   
-                await progress_message.edit("**❌ __Video is longer than 3 hours. Download aborted...__**")
-                return None
- 
-             
-            estimated_size = info_dict.get('filesize_approx', 0)
-            if estimated_size and estimated_size > 2 * 1024 * 1024 * 1024:   
-                await progress_message.edit("**🤞 __Video size is larger than 2GB. Aborting download.__**")
-                return None
+    if check_duration_and_size:
+         
+        duration = info_dict.get('duration', 0)
+        if duration and duration > 3 * 3600:   
+            await progress_message.edit("**❌ __Video is longer than 3 hours. Download aborted...__**")
+            return None
  
-        return info_dict
+         
+        estimated_size = info_dict.get('filesize_approx', 0)
+        if estimated_size and estimated_size > 2 * 1024 * 1024 * 1024:   
+            await progress_message.edit("**🤞 __Video size is larger than 2GB. Aborting download.__**")
+            return None
  
-def download_video(url, ydl_opts):
-    with yt_dlp.YoutubeDL(ydl_opts) as ydl:
-        ydl.download([url])
+    return info_dict
  
  
 @client.on(events.NewMessage(pattern="/dl"))
@@ -230,6 +299,7 @@ async def handler(event):
         return    
  
     url = event.message.text.split()[1]
+    ongoing_downloads[user_id] = True
  
      
     try:
@@ -345,18 +415,34 @@ async def process_video(client, event, url, cookies_env_var, check_duration_and_
         'cookiefile': temp_cookie_path if temp_cookie_path else None,
         'writethumbnail': True,
         'verbose': True,
+        **DOWNLOADER_PROFILE,
     }
     prog = None
+    ticket = None
     progress_message = await event.reply("**__Starting download...__**")
     logger.info("Starting the download process...")
     try:
         info_dict = await fetch_video_info(url, ydl_opts, progress_message, check_duration_and_size)
         if not info_dict:
             return
-         
-        await asyncio.to_thread(download_video, url, ydl_opts)
+
+        expected_size = info_dict.get('filesize') or info_dict.get('filesize_approx') or 0
+        # Queue for a yt-dlp slot first and hold the admission ticket only
+        # while bytes are being written, as get_msg does.
+        await ytdl_turn(progress_message)
+        try:
+            ticket = await admission.acquire(
+                expected_size,
+                notify=lambda position, eta: progress_message.edit(queue_text(position, eta))
+            )
+            await progress_message.edit("**__Downloading...__**")
+            info_dict = await download_info(info_dict, ydl_opts, download_progress(progress_message))
+            await admission.release(ticket)
+            ticket = None
+        finally:
+            ytdl_slots.release()
         title = info_dict.get('title', 'Powered by KINGSTON')
-        k = video_metadata(download_path)      
+        k = await video_metadata(download_path)
         W = k['width']
         H = k['height']
         D = k['duration']
@@ -369,14 +455,12 @@ async def process_video(client, event, url, cookies_env_var, check_duration_and_
          
         if thumbnail_url:
             thumbnail_file = os.path.join(tempfile.gettempdir(), get_random_string() + ".jpg")
-            downloaded_thumb = d_thumbnail(thumbnail_url, thumbnail_file)
-            if downloaded_thumb:
-                logger.info(f"Thumbnail saved at: {downloaded_thumb}")
+            THUMB = await asyncio.to_thread(d_thumbnail, thumbnail_url, thumbnail_file)
+            if THUMB:
+                logger.info(f"Thumbnail saved at: {THUMB}")
  
-        if thumbnail_file:
-            THUMB = thumbnail_file
-        else:
-            THUMB = await screenshot(download_path, metadata['duration'], event.sender_id)
+        if not THUMB:
+            THUMB = await get_thumbnail(download_path, event.sender_id, metadata['duration'])
  
          
  
@@ -416,11 +500,13 @@ async def process_video(client, event, url, cookies_env_var, check_duration_and_
                 await prog.delete()
         else:
             await event.reply("**__File not found after download. Something went wrong!__**")
+    except InsufficientSpace as e:
+        await event.reply(f"**__❌ {e}__**")
     except Exception as e:
         logger.exception("An error occurred during download or upload.")
         await event.reply(f"**__An error occurred: {e}__**")
     finally:
-         
+        await admission.release(ticket)
         if os.path.exists(download_path):
             os.remove(download_path)
         if temp_cookie_path and os.path.exists(temp_cookie_path):
@@ -436,35 +522,11 @@ async def split_and_upload_file(app, sender, file_path, caption):
 
     file_size = os.path.getsize(file_path)
     start = await app.send_message(sender, f"ℹ️ File size: {file_size / (1024 * 1024):.2f} MB")
-    PART_SIZE =  1.9 * 1024 * 1024 * 1024
-
-    part_number = 0
-    async with aiofiles.open(file_path, mode="rb") as f:
-        while True:
-            chunk = await f.read(PART_SIZE)
-            if not chunk:
-                break
-
-            # Create part filename
-            base_name, file_ext = os.path.splitext(file_path)
-            part_file = f"{base_name}.part{str(part_number).zfill(3)}{file_ext}"
-
-            # Write part to file
-            async with aiofiles.open(part_file, mode="wb") as part_f:
-                await part_f.write(chunk)
-
-            # Uploading part
-            edit = await app.send_message(sender, f"⬆️ Uploading part {part_number + 1}...")
-            part_caption = f"{caption} \n\n**Part : {part_number + 1}**"
-            await app.send_document(sender, document=part_file, caption=part_caption,
-                progress=progress_bar,
-                progress_args=("╭─────────────────────╮\n│      **__Pyro Uploader__**\n├─────────────────────", edit, time.time())
-            )
-            await edit.delete()
-            os.remove(part_file)  # Cleanup after upload
-
-            part_number += 1
-
+    # Parts are read in place from the original file, no .partNNN copies.
+    # They upload to LOG_GROUP concurrently, then reach the user in order.
+    parts = await upload_file_parts(app, sender, file_path, caption)
+    for part in parts:
+        await app.copy_message(sender, LOG_GROUP, part.id)
     await start.delete()
     os.remove(file_path)
  